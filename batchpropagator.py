@@ -0,0 +1,193 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+#!/usr/bin/env python3
+
+import sys
+import time
+import itertools
+
+import gameboard
+import filereader
+import btsolver
+import main
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BatchPropagator:
+    def __init__(self, boards):
+        """
+            Runs naked singles and hidden singles over many boards at once.
+
+            The boards are held as one boolean candidate tensor of shape
+            (boards, N, N, N): candidates[b, i, j, v - 1] is true while value v
+            can still go in cell (i, j) of board b. Every elimination is a
+            reduction over the row, column or block axes of the whole tensor,
+            so a pass costs a handful of array operations however many boards
+            there are.
+
+            @param boards list of GameBoards sharing the same N, p and q
+            @throws ImportError if NumPy is not installed
+        """
+        if numpy is None:
+            raise ImportError("BatchPropagator requires NumPy (pip install numpy)")
+
+        self.N = boards[0].N
+        self.p = boards[0].p
+        self.q = boards[0].q
+        for gb in boards:
+            if (gb.N, gb.p, gb.q) != (self.N, self.p, self.q):
+                raise ValueError("Boards of a batch must share the same N, p and q")
+
+        values = numpy.array([gb.board for gb in boards], dtype=numpy.int32)
+        onehot = values[..., None] == numpy.arange(1, self.N + 1)
+        self.candidates = numpy.where((values > 0)[..., None], onehot, True)
+        self.contradiction = numpy.zeros(len(boards), dtype=bool)
+        self.numPasses = 0
+
+    ######### Helper Method #########
+    def unitSums(self, tensor):
+        """
+            @return the number of true entries of a candidate tensor over the
+                    row, the column and the block of every cell, per value
+        """
+        N, p, q = self.N, self.p, self.q
+        blocks = tensor.reshape(len(tensor), N // p, p, N // q, q, N)
+        inBlock = blocks.sum(axis=(2, 4), keepdims=True, dtype=numpy.int8)
+        inBlock = numpy.broadcast_to(inBlock, blocks.shape).reshape(tensor.shape)
+        return (tensor.sum(axis=2, keepdims=True, dtype=numpy.int8),
+                tensor.sum(axis=1, keepdims=True, dtype=numpy.int8),
+                inBlock)
+
+    def step(self, cand):
+        """
+            One pass of naked singles and hidden singles over some boards.
+            @param cand candidate tensor of the boards
+            @return the new candidate tensor and, per board, whether it was
+                    found to have no solution
+        """
+        # naked singles: a decided cell takes its value out of its units
+        placed = cand & (cand.sum(axis=3, keepdims=True, dtype=numpy.int8) == 1)
+        placedIn = self.unitSums(placed)
+        taken = (placedIn[0] > 0) | (placedIn[1] > 0) | (placedIn[2] > 0)
+        cand = cand & (placed | ~taken)
+
+        # hidden singles: a value with one cell left in a unit goes there
+        cellsFor = self.unitSums(cand)
+        forced = cand & ((cellsFor[0] == 1) | (cellsFor[1] == 1) | (cellsFor[2] == 1))
+        numForced = forced.sum(axis=3, keepdims=True, dtype=numpy.int8)
+        cand = numpy.where(numForced > 0, forced, cand)
+
+        # a value decided twice in a unit, a cell forced to two values, or a
+        # value with no cell left in a unit ends the board
+        dead = numpy.zeros(len(cand), dtype=bool)
+        for count in placedIn:
+            dead |= (count > 1).any(axis=(1, 2, 3))
+        dead |= (numForced > 1).any(axis=(1, 2, 3))
+        for count in cellsFor:
+            dead |= (count == 0).any(axis=(1, 2, 3))
+        return cand, dead
+
+    ######### Propagation Method #########
+    def propagate(self):
+        """
+            Applies naked singles and hidden singles to every board until no
+            candidate changes. Each pass only works on the boards the previous
+            pass changed. Boards that turn out to have no solution are flagged
+            in self.contradiction and left as they were before that pass.
+        """
+        cand = self.candidates
+        active = numpy.flatnonzero(~self.contradiction)
+        while active.size:
+            self.numPasses += 1
+            before = cand[active]
+            after, dead = self.step(before)
+            changed = (after != before).any(axis=(1, 2, 3)) & ~dead
+
+            cand[active[changed]] = after[changed]
+            self.contradiction[active[dead]] = True
+            active = active[changed]
+
+    ######### Accessors Method #########
+    def isSolved(self, b):
+        """ @return true if every cell of board b is decided and it has no contradiction """
+        return not self.contradiction[b] and bool((self.candidates[b].sum(axis=2) == 1).all())
+
+    def getBoard(self, b):
+        """ @return a GameBoard of board b holding the decided cells, 0 elsewhere """
+        cand = self.candidates[b]
+        values = numpy.where(cand.sum(axis=2) == 1, cand.argmax(axis=2) + 1, 0)
+        return gameboard.GameBoard(self.N, self.p, self.q, values.tolist())
+
+
+def readBoards(paths):
+    """
+        @return generator of the GameBoards of the puzzle files, read one at a
+                time through filereader.SudokuStreamReader
+    """
+    for path in paths:
+        for gb in filereader.SudokuStreamReader(path):
+            yield gb
+
+
+def solveBoards(boards, tokens, batchSize=4096):
+    """
+        Propagates the boards in batches, then hands the boards propagation
+        could not finish to BTSolver.
+        @param boards list of GameBoards. Boards of different sizes go in
+                      different batches.
+        @param tokens solver tokens for BTSolver, as for main.py
+        @param batchSize largest number of boards in one candidate tensor
+        @return list of (status, GameBoard) per board, in input order. The
+                status is "propagated", "success" or "failure".
+    """
+    results = [None] * len(boards)
+    shapes = dict()
+    for i, gb in enumerate(boards):
+        shapes.setdefault((gb.N, gb.p, gb.q), []).append(i)
+
+    for indices in shapes.values():
+        for start in range(0, len(indices), batchSize):
+            chunk = indices[start:start + batchSize]
+            propagator = BatchPropagator([boards[i] for i in chunk])
+            propagator.propagate()
+            for b, i in enumerate(chunk):
+                if propagator.contradiction[b]:
+                    results[i] = ("failure", boards[i])
+                elif propagator.isSolved(b):
+                    results[i] = ("propagated", propagator.getBoard(b))
+                else:
+                    solver = btsolver.BTSolver(propagator.getBoard(b))
+                    main.setSolverTokens(solver, tokens, verbose=False)
+                    solver.solve()
+                    status = "success" if solver.hassolution else "failure"
+                    results[i] = (status, solver.getSolution())
+    return results
+
+
+if __name__ == '__main__':
+    # python batchpropagator.py <DirectoryGlobOrListFile> <tokens>
+    import batchsolver
+    paths = batchsolver.findPuzzleFiles(sys.argv[1])
+    if not paths:
+        raise ValueError("No puzzle files found for \"" + sys.argv[1] + "\"")
+
+    # one batch of boards in memory at a time
+    start = time.time()
+    boards = readBoards(paths)
+    statuses = {"propagated": 0, "success": 0, "failure": 0}
+    while True:
+        chunk = list(itertools.islice(boards, 4096))
+        if not chunk:
+            break
+        for status, gb in solveBoards(chunk, sys.argv[2:]):
+            statuses[status] += 1
+    print("PUZZLES=" + str(sum(statuses.values())))
+    print("SOLVED_BY_PROPAGATION=" + str(statuses["propagated"]))
+    print("SOLVED_BY_SEARCH=" + str(statuses["success"]))
+    print("FAILURES=" + str(statuses["failure"]))
+    print("WALL_TIME=%.7f" % (time.time() - start))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import os
+import sys
+import glob
+import signal
+import time
+import argparse
+import collections
+import multiprocessing
+
+import filereader
+import gameboard
+import resultwriter
+import main
+
+# puzzles handed out per worker and not yet written
+WINDOW = 64
+
+
+def findPuzzleFiles(source):
+    """
+        Expands the input of a batch run into a list of puzzle files.
+        @param source a directory (every *.txt inside it), a glob pattern, a
+                      puzzle file (holding one puzzle or many, see
+                      filereader.SudokuStreamReader), "-" for stdin, or a list
+                      file holding one puzzle path per line (relative paths are
+                      taken from the list file's directory)
+        @return sorted list of puzzle file paths
+    """
+    if source == "-":
+        return [source]
+
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.txt")))
+
+    if not os.path.isfile(source):
+        return sorted(glob.glob(source))
+
+    # only the first line tells a puzzle file, which may be huge, from a list;
+    # an "N p q" line of a bad size still starts a puzzle, reported as malformed
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                if filereader.isPuzzleLine(line, checkSize=False):
+                    return [source]
+                break
+
+    base = os.path.dirname(source)
+    with open(source) as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+def iterPuzzles(paths):
+    """
+        Reads the puzzles of the files one at a time.
+        @return generator of (name, board) pairs. The name is the path of a
+                file holding one puzzle, and path:k for the k-th puzzle of a
+                file holding several. The board is a GameBoard, or the error
+                message if the puzzle or the file could not be read; the
+                puzzles after a malformed one are still read.
+    """
+    for path in paths:
+        puzzles = (gb if isinstance(gb, gameboard.GameBoard) else "Could not read puzzle: " + str(gb)
+                   for gb in filereader.SudokuStreamReader(path, skipErrors=True))
+        try:
+            first = next(puzzles, None)
+            second = next(puzzles, None)
+            if second is None:
+                if first is not None:
+                    yield path, first
+                continue
+            yield path + ":1", first
+            yield path + ":2", second
+            for k, gb in enumerate(puzzles, 3):
+                yield path + ":" + str(k), gb
+        except (IOError, OSError) as e:
+            yield path, "Could not read puzzle: " + str(e)
+
+
+def solvePuzzle(task):
+    """
+        Solves one puzzle inside a worker process.
+        @param task (name, board, timeout in seconds, tokens), with name and
+                    board as given by iterPuzzles
+        @return dictionary holding the result record of the puzzle
+    """
+    name, board, timeout, tokens = task
+    record = {"file": name, "status": "error", "time": 0.0,
+              "nodes": 0, "deadends": 0, "solution": ""}
+    if not isinstance(board, gameboard.GameBoard):
+        record["message"] = board
+        return record
+
+    signal.signal(signal.SIGALRM, main.signal_handler)
+    signal.alarm(timeout)
+    solver = None
+    isTimeOut = False
+    try:
+        solver = main.createSolver(board, tokens)
+        main.setSolverTokens(solver, tokens, verbose=False)
+        solver.solve()
+    except main.TimeoutException:
+        isTimeOut = True
+        if solver is not None and solver.startTime is not None:
+            solver.endTime = time.time()
+    except Exception as e:
+        record["message"] = str(e)
+        return record
+    finally:
+        signal.alarm(0)
+
+    if isTimeOut:
+        record["status"] = "timeout"
+        if solver is None or solver.startTime is None:
+            return record
+    else:
+        record["status"] = main.solverStatus(solver, isTimeOut)
+
+    record["time"] = ((solver.preprocessing_endTime - solver.preprocessing_startTime)
+                      + (solver.endTime - solver.startTime))
+    record["nodes"] = solver.numAssignments
+    record["deadends"] = solver.numBacktracks
+    if solver.solutionLimit != 1:
+        record["solutions"] = solver.numSolutions
+    if solver.hassolution:
+        record["solution"] = resultwriter.compactSolution(solver.gameboard.board)
+    return record
+
+
+def addToTotals(totals, record):
+    """ adds one result record to the running totals of a batch run """
+    totals["puzzles"] += 1
+    totals[record["status"]] = totals.get(record["status"], 0) + 1
+    totals["time"] += record["time"]
+    totals["nodes"] += record["nodes"]
+    totals["deadends"] += record["deadends"]
+
+
+def formatSummary(totals, wallTime, workers):
+    """ aggregate throughput statistics of a batch run """
+    output = "PUZZLES=" + str(totals["puzzles"])
+    output += "\nSOLVED=" + str(totals.get("success", 0))
+    output += "\nTIMEOUTS=" + str(totals.get("timeout", 0))
+    output += "\nERRORS=" + str(totals.get("error", 0))
+    output += "\nWORKERS=" + str(workers)
+    output += "\nWALL_TIME=%.7f" % wallTime
+    output += "\nTOTAL_SOLUTION_TIME=%.7f" % totals["time"]
+    output += "\nCOUNT_NODES=" + str(totals["nodes"])
+    output += "\nCOUNT_DEADENDS=" + str(totals["deadends"])
+    if wallTime > 0:
+        output += "\nPUZZLES_PER_SECOND=%.3f" % (totals["puzzles"] / wallTime)
+    return output
+
+
+def solveBatch(paths, outputPath, timeout, tokens, workers, form="text"):
+    """
+        Solves every puzzle of the files in paths on a pool of worker processes
+        and writes one record per puzzle, in input order, followed by the
+        summary in the text form. The puzzles are read as they are handed out
+        and at most WINDOW puzzles per worker are outstanding, so files of any
+        size are solved in constant memory. A new puzzle goes out as soon as
+        the oldest outstanding one is done, so a slow puzzle keeps one worker
+        busy instead of holding back the others.
+        @param form format of the output file, see resultwriter.ResultWriter
+        @return the totals of the run
+    """
+    start = time.time()
+    tasks = ((name, board, timeout, tokens) for name, board in iterPuzzles(paths))
+    totals = {"puzzles": 0, "time": 0.0, "nodes": 0, "deadends": 0}
+    writer = resultwriter.ResultWriter(outputPath, form)
+    pool = multiprocessing.Pool(workers)
+    pending = collections.deque()  # results of the puzzles handed out, in input order
+    try:
+        for task in tasks:
+            pending.append(pool.apply_async(solvePuzzle, (task,)))
+            if len(pending) >= WINDOW * workers:
+                record = pending.popleft().get()
+                addToTotals(totals, record)
+                writer.write(record)
+        while pending:
+            record = pending.popleft().get()
+            addToTotals(totals, record)
+            writer.write(record)
+        summary = formatSummary(totals, time.time() - start, workers)
+        writer.writeSummary(summary)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        writer.close()
+        pool.join()
+
+    print(summary)
+    return totals
+
+
+def parseCommandLineArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Solve many puzzles with one pool of worker processes.")
+    parser.add_argument("input", help="directory, glob pattern, puzzle file, list file, or - for stdin")
+    parser.add_argument("output", help="file receiving one record per puzzle")
+    parser.add_argument("timeout", type=int, help="time limit per puzzle in seconds")
+    parser.add_argument("tokens", nargs="*", help="solver tokens, as for main.py")
+    parser.add_argument("-j", "--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: number of cores)")
+    parser.add_argument("-f", "--format", choices=resultwriter.FORMATS, default="text",
+                        help="format of the output file (default: %(default)s)")
+    # options may come between the positionals, e.g. 60 -j 4 FC MRV
+    return parser.parse_intermixed_args(argv)
+
+
+if __name__ == '__main__':
+    args = parseCommandLineArguments(sys.argv[1:])
+    paths = findPuzzleFiles(args.input)
+    if not paths:
+        raise ValueError("No puzzle files found for \"" + args.input + "\"")
+    solveBatch(paths, args.output, args.timeout, args.tokens, max(1, args.workers), args.format)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import sys
+import json
+import time
+import platform
+import argparse
+
+import batchsolver
+
+
+DEFAULT_MATRIX = ["BT", "FC", "FC MRV", "FC DH", "FC MRV LCV", "ACP", "ACP MRV",
+                  "ACP MRV LCV", "FC MRV NKP", "FC MRV NKT", "ACP MRV DH LCV NKP NKT"]
+DEFAULT_INPUT = "ExampleSudokuFiles/P*.txt"
+
+
+def runBenchmark(paths, matrix, timeout, repeat):
+    """
+        Solves every puzzle with every token combination, one at a time in this
+        process so the timings do not compete with each other.
+        @param matrix list of token strings, e.g. "FC MRV LCV"
+        @param repeat number of runs per puzzle; the fastest one is kept
+        @return list of result records, one per token combination and puzzle
+    """
+    results = []
+    for tokens in matrix:
+        for name, board in batchsolver.iterPuzzles(paths):
+            best = None
+            for i in range(repeat):
+                start = time.time()
+                record = batchsolver.solvePuzzle((name, board, timeout, tokens.split()))
+                record["wall"] = time.time() - start
+                if best is None or record["wall"] < best["wall"]:
+                    best = record
+            best["tokens"] = tokens
+            del best["solution"]
+            results.append(best)
+    return results
+
+
+def summarize(results):
+    """ @return totals of time, nodes, dead ends and solved puzzles per token combination """
+    totals = dict()
+    for r in results:
+        total = totals.setdefault(r["tokens"], {"puzzles": 0, "solved": 0, "time": 0.0,
+                                                "wall": 0.0, "nodes": 0, "deadends": 0})
+        total["puzzles"] += 1
+        total["solved"] += r["status"] == "success"
+        for key in ("time", "wall", "nodes", "deadends"):
+            total[key] += r[key]
+    return totals
+
+
+def compareToBaseline(results, baseline, threshold, minTime):
+    """
+        Finds the runs that got worse than the same token combination on the
+        same puzzle in the baseline.
+        @param threshold relative increase of wall time or nodes to report,
+                         e.g. 0.2 for 20%
+        @param minTime wall time, in seconds, below which timings are too
+                       noisy to be compared
+        @return list of (tokens, file, description) of the regressions
+    """
+    previous = dict(((r["tokens"], r["file"]), r) for r in baseline["results"])
+    regressions = []
+    for r in results:
+        old = previous.get((r["tokens"], r["file"]))
+        if old is None:
+            continue
+        if old["status"] == "success" and r["status"] != "success":
+            regressions.append((r["tokens"], r["file"], "status " + old["status"] + " -> " + r["status"]))
+            continue
+        if r["status"] != "success":
+            continue
+        if r["nodes"] > old["nodes"] * (1 + threshold):
+            regressions.append((r["tokens"], r["file"],
+                                "nodes %d -> %d" % (old["nodes"], r["nodes"])))
+        if max(r["wall"], old["wall"]) >= minTime and r["wall"] > old["wall"] * (1 + threshold):
+            regressions.append((r["tokens"], r["file"],
+                                "wall time %.3fs -> %.3fs" % (old["wall"], r["wall"])))
+    return regressions
+
+
+def formatTotals(totals, matrix):
+    """ one line per token combination, in the style of the batch summary """
+    lines = []
+    for tokens in matrix:
+        t = totals[tokens]
+        lines.append("TOKENS=%-24s SOLVED=%d/%d\tWALL_TIME=%.3f\tCOUNT_NODES=%d\tCOUNT_DEADENDS=%d"
+                     % (tokens, t["solved"], t["puzzles"], t["wall"], t["nodes"], t["deadends"]))
+    return "\n".join(lines)
+
+
+def parseCommandLineArguments(argv):
+    parser = argparse.ArgumentParser(
+        description="Time the solver over a set of puzzles and a matrix of token combinations.")
+    parser.add_argument("output", help="JSON file receiving the results")
+    parser.add_argument("-i", "--input", default=DEFAULT_INPUT,
+                        help="directory, glob pattern, puzzle file or list file (default: %(default)s)")
+    parser.add_argument("-m", "--matrix", action="append",
+                        help="token combination to run, e.g. \"FC MRV LCV\"; repeat for several "
+                             "(default: " + ", ".join(DEFAULT_MATRIX) + ")")
+    parser.add_argument("-t", "--timeout", type=int, default=10,
+                        help="time limit per puzzle in seconds (default: %(default)s)")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="runs per puzzle, keeping the fastest (default: %(default)s)")
+    parser.add_argument("-b", "--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="wall time in seconds below which timings are not compared (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parseCommandLineArguments(sys.argv[1:])
+    paths = batchsolver.findPuzzleFiles(args.input)
+    if not paths:
+        raise ValueError("No puzzle files found for \"" + args.input + "\"")
+    matrix = args.matrix or DEFAULT_MATRIX
+
+    results = runBenchmark(paths, matrix, args.timeout, max(1, args.repeat))
+    totals = summarize(results)
+    with open(args.output, "w") as outfile:
+        json.dump({"python": platform.python_version(),
+                   "date": time.asctime(),
+                   "timeout": args.timeout,
+                   "results": results,
+                   "totals": totals}, outfile, indent=1, sort_keys=True)
+    print(formatTotals(totals, matrix))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compareToBaseline(results, baseline, args.threshold, args.min_time)
+        for tokens, path, description in regressions:
+            print("REGRESSION\tTOKENS=" + tokens + "\tFILE=" + path + "\t" + description)
+        print("REGRESSIONS=" + str(len(regressions)))
+        if regressions:
+            sys.exit(1)
@@ -5,14 +5,17 @@ import filereader
 import gameboard
 import variable
 import domain
-import trail
 import constraint
 import constraintnetwork
+import domainbuckets
+import degreecounts
+import unitsupport
 import time
 from collections import defaultdict
-import Queue
+from collections import deque
 
-import itertools
+import subsets
+import solverprofile
 
 # dictionary mapping heuristic to number
 '''
@@ -25,12 +28,26 @@ you can also manually set the heuristics in the main.py file when reading the pa
 as the primary heuristics to use and then break ties within the functions you implement
 It follows similarly to the other heuristics and chekcs
 '''
-VariableSelectionHeuristic = {'None': 0, 'MRV': 1, 'DH': 2}
+VariableSelectionHeuristic = {'None': 0, 'MRV': 1, 'DH': 2, 'MRVDH': 3}
 ValueSelectionHeuristic = {'None': 0, 'LCV': 1}
 ConsistencyCheck = {'None': 0, 'ForwardChecking': 1, 'ArcConsistency': 2}
-HeuristicCheck = {'None': 0, 'NKP': 1, 'NKT': 2}
+HeuristicCheck = {'None': 0, 'NKP': 1, 'NKT': 2, 'HS': 4, 'NKS': 8, 'HDS': 16}
+RestartSchedule = {'None': 0, 'Luby': 1, 'Geometric': 2}
 
 MIN_DOMAIN = 2
+RESTART_GROWTH = 1.5  # growth of the node limit between geometric restarts
+
+
+def luby(i):
+    """ @return the i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ... """
+    while True:
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
 
 class BTSolver:
     "Backtracking solver"
@@ -38,7 +55,7 @@ class BTSolver:
     ######### Constructors Method #########
     def __init__(self, gb):
         self.network = filereader.GameBoardToConstraintNetwork(gb)
-        self.trail = trail.masterTrailVariable
+        self.trail = self.network.trail
         self.hassolution = False
         self.gameboard = gb
 
@@ -46,6 +63,8 @@ class BTSolver:
 
         self.numAssignments = 0
         self.numBacktracks = 0
+        self.numSolutions = 0
+        self.solutionLimit = 1  # stop after this many solutions, 0 to count them all
         self.preprocessing_startTime = 0
         self.preprocessing_endTime = 0
         self.startTime = None
@@ -55,6 +74,21 @@ class BTSolver:
         self.valHeuristics = 0  # refers to which value selection heuristic in use(0 means default, 1 means LCV)
         self.cChecks = 0  # refers to which consistency check will be run(0 for backtracking, 1 for forward checking, 2 for arc consistency)
         self.heuristicChecks = 0
+        self.nakedSubsetSize = 4  # largest subset looked for by NKS
+        self.hiddenSubsetSize = 4  # largest subset looked for by HDS
+        self.domainBuckets = None  # unassigned variables by domain size, built by getMRV
+        self.degreeCounts = None  # unassigned neighbors of each variable, built by getDegree
+        self.unitSupport = None  # cells allowing each value in each unit, built by getValuesLCVOrder
+        self.profile = None  # per phase counters and timers, see setProfiling
+        self.cache = None  # solutions of earlier boards, see setCache
+        self.cacheHit = False
+        self.random = None  # random number generator breaking ties, see setRandom
+        self.tieRank = None  # random rank of every variable for breaking ties, drawn by shuffleTies
+        self.restartSchedule = 0  # refers to the restart schedule in use(0 means no restarts)
+        self.restartBase = 0  # nodes searched before the first restart
+        self.numRestarts = 0
+        self.nodeLimit = 0  # numAssignments at which solveLevel gives up, 0 for no limit
+        self.fetchedFlags = []  # (trail depth, variables) of the modified flags fetched by checkHeuristics
         # self.runCheckOnce = False
         self.tokens = []  # tokens(heuristics to use)
 
@@ -77,8 +111,47 @@ class BTSolver:
         self.cChecks = cc
 
     def setHeuristicChecks(self, hc):
-        '''modify the heurisic check (naked pairs and triples)'''
-        self.heuristicChecks += hc
+        '''add a heurisic check (naked pairs, naked triples, hidden singles)'''
+        self.heuristicChecks |= hc
+
+    def setNakedSubsetSize(self, k):
+        '''modify the largest naked subset looked for by NKS'''
+        self.nakedSubsetSize = k
+
+    def setHiddenSubsetSize(self, k):
+        '''modify the largest hidden subset looked for by HDS'''
+        self.hiddenSubsetSize = k
+
+    def setSolutionLimit(self, limit):
+        '''modify the number of solutions to find before stopping, 0 for all of them'''
+        self.solutionLimit = limit
+
+    def setProfiling(self):
+        '''count and time the phases of the search, see solverprofile.SolverProfile'''
+        if self.profile is None:
+            self.profile = solverprofile.SolverProfile()
+            self.profile.attach(self)
+
+    def setCache(self, cache):
+        '''look boards up in a solutioncache.SolutionCache before searching, and add the solutions found to it'''
+        self.cache = cache
+
+    def setRandom(self, rng):
+        '''
+            break the ties of MRV, of MRV with the degree heuristic and of LCV at
+            random, and try values in random order without LCV, drawing from rng
+            (a random.Random)
+        '''
+        self.random = rng
+
+    def setRestarts(self, schedule, base):
+        '''
+            restart the search after base nodes, then after more nodes each time
+            following the schedule (see RestartSchedule); needs setRandom. A base
+            below 1 is taken as 1, so the limits still grow.
+        '''
+        self.restartSchedule = schedule
+        self.restartBase = max(1, base)
 
     ######### Accessors Method #########
     def getSolution(self):
@@ -101,14 +174,60 @@ class BTSolver:
             return self.assignmentsCheck()
 
     def checkHeuristics(self):
-        if self.heuristicChecks == 1:
-            return self.nakedPairs()
-        elif self.heuristicChecks == 2:
-            return self.nakedTriples()
-        elif self.heuristicChecks == 3:
-            return self.nakedPairs() and self.nakedTriples()
-        else:
-            return True    
+        if self.heuristicChecks == 0:
+            return True
+
+        start = self.trail.size()
+        consistent = True
+
+        # subset checks only need to look again at the units changed since the
+        # previous node. Fetching them resets the flags, so the passes share
+        # the list, each adding the units the passes before it narrowed; those
+        # stay flagged so the earlier passes see them at the next node. The
+        # flags fetched here are raised again when the search backtracks past
+        # this node (see restoreFlags), whether a pass fails here or below, so
+        # the next value tried here examines the same units
+        subsetChecks = (HeuristicCheck['NKP'] | HeuristicCheck['NKT']
+                        | HeuristicCheck['NKS'] | HeuristicCheck['HDS'])
+        if self.heuristicChecks & subsetChecks:
+            self.fetchedFlags.append((len(self.trail.trailMarker), list(self.network.modifiedVariables)))
+            modified = self.network.getModifiedConstraints()
+        if self.heuristicChecks & HeuristicCheck['NKP']:
+            consistent = self.nakedPairs(modified)
+        if consistent and self.heuristicChecks & HeuristicCheck['NKT']:
+            modified = self.addNarrowedUnits(modified, start)
+            consistent = self.nakedTriples(modified)
+        if consistent and self.heuristicChecks & HeuristicCheck['NKS']:
+            modified = self.addNarrowedUnits(modified, start)
+            consistent = self.nakedSubsets(self.nakedSubsetSize, modified)
+        if consistent and self.heuristicChecks & HeuristicCheck['HDS']:
+            modified = self.addNarrowedUnits(modified, start)
+            consistent = self.hiddenSubsets(self.hiddenSubsetSize, modified)
+        if consistent and self.heuristicChecks & HeuristicCheck['HS']:
+            consistent = self.hiddenSingles()
+
+        # keep the node arc consistent after the heuristics pruned domains
+        if consistent and self.cChecks == 2 and self.trail.size() > start:
+            return self.arcConsistency(start)
+        return consistent
+
+    def addNarrowedUnits(self, units, start):
+        """
+            @param start size of the trail when the heuristics started at this node
+            @return units followed by the units changed since they were fetched,
+                    without resetting the changes
+        """
+        if self.trail.size() == start:
+            return units
+        seen = set(units)
+        return units + [c for c in self.network.getModifiedConstraints(False) if c not in seen]
+
+    def restoreFlags(self):
+        """ flags again the variables whose flags were fetched at the nodes just undone """
+        depth = len(self.trail.trailMarker)
+        fetched = self.fetchedFlags
+        while fetched and fetched[-1][0] > depth:
+            self.network.setModified(fetched.pop()[1])
 
     def assignmentsCheck(self):
         """
@@ -123,147 +242,242 @@ class BTSolver:
         return True
 
 
-    def nakedPairs(self):
-
-        ################################################################
-        # True if eliminate val from neighbors' domains upon assignment
-        propagate = False
-        ################################################################
-
-        # set of all contraints to check
-        constraint_set = set(self.network.constraints)
-
-        # constraint: each row, column, and block
-        while len(constraint_set) > 0:
-
-            # get row, column, or block
-            constraint = constraint_set.pop()
-
-            # for all cells in constraint with domain size of 2
-            for var_a, var_b in itertools.combinations([x for x in constraint.vars if x.domain.size() == 2], 2):
-
-                # if domains are the same, pair found
-                if set(var_a.Values()) == set(var_b.Values()):
-
-                    # var_c: variable to remove values from
-                    for var_c in constraint.vars:
-
-                        # variable must be outside of pair
-                        if var_a is var_c or var_b is var_c:
-                            continue
-
-                        altered_domain = False
-                        old_domain_size = var_c.domain.size()
-
-                        # all values to remove from variables in constraint
-                        for val in var_a.domain.values:
-
-                            # if var is already assigned with the val to elim, inconsistency detected
-                            if var_c.isAssigned() and var_c.getAssignment() == val:
-                                return False
-
-                            # attempt to remove from var_c
-                            var_c.removeValueFromDomain(val)
-
-                        # if size difference, then domain has been altered
-                        altered_domain = var_c.domain.size() != old_domain_size
+    def nakedPairs(self, constraints=None):
+        """
+            Naked pairs: two cells of a unit left with the same two values.
+            @param constraints units to examine. Defaults to the units whose cells
+                               changed since the last call (see
+                               ConstraintNetwork.getModifiedConstraints); the
+                               other units were already examined at an ancestor
+                               node and have not changed since.
+        """
+        return self.nakedSubsets(2, constraints)
 
-                        # if new cell is potentially part of naked pair, add constraints to set
-                        if altered_domain and var_c.domain.size() == 2:
-                            for c in self.network.getConstraintsContainingVariable(var_c):
-                                constraint_set.add(c)
+    def nakedTriples(self, constraints=None):
+        """
+            Naked triples (and pairs): up to three cells of a unit sharing three
+            values between them.
+            @param constraints units to examine, as in nakedPairs
+        """
+        return self.nakedSubsets(3, constraints)
 
-                        # DEBUG: Assignment has been made
-                        if propagate and altered_domain and var_c.isAssigned():
+    def nakedSubsets(self, k, constraints=None):
+        """
+            Naked subsets of size 2 to k: when j cells of a unit have only j values
+            between them, no other cell of the unit can take those values.
+
+            Units whose cells lose values are examined again until nothing
+            changes.
+            @param k largest subset to look for
+            @param constraints units to examine, as in nakedPairs
+            @return false if a unit has more cells than values in some subset,
+                    or a removal wipes out a domain
+        """
+        if constraints is None:
+            constraints = self.network.getModifiedConstraints()
+        queue = deque(constraints)
+        queued = set(queue)
+
+        while queue:
+            unit = queue.popleft()
+            queued.discard(unit)
+
+            cells = [x for x in unit.vars if 1 < x.domain.count <= k]
+            for chosen, union in subsets.findSubsets([x.domain.bits for x in cells], k):
+                if domain.popcount(union) < len(chosen):
+                    return False
 
-                            # not adding potential naked pair cells...
-                            consistent = self.forwardChecking()
-                            if not consistent:
-                                print("INC")
-                                return False
+                members = set(cells[i] for i in chosen)
+                changed = self.restrictDomains([x for x in unit.vars if x not in members], ~union)
+                if changed is None:
+                    return False
+                if changed:
+                    # the masks of this unit are stale now, it is queued again
+                    self.queueUnitsOf(changed, queue, queued)
+                    break
 
         return True
 
-
-    def nakedTriples(self):
-
-        ################################################################
-        # True if eliminate val from neighbors' domains upon assignment
-        propagate = False
-        ################################################################
-
-        # set of all contraints to check
-        constraint_set = set(self.network.constraints)
-
-        # constraint: each row, column, and block
-        while len(constraint_set) > 0:
-
-            # get row, column, or block
-            constraint = constraint_set.pop()
-
-            # for all cells in constraint with domain.size of 3 or less
-            for var_a, var_b in itertools.combinations([x for x in constraint.vars if x.domain.size() <= 3], 2):
-
-                # both variables must be unassigned
-                if var_a.isAssigned() or var_b.isAssigned():
-                    continue
-
-                # union of domains must equal 3
-                prelim_union = set(var_a.domain.values) | set(var_b.domain.values)
-                if len(prelim_union) != 3:
+    def hiddenSubsets(self, k, constraints=None):
+        """
+            Hidden subsets of size 2 to k: when j values of a unit can only go in
+            the same j cells, those cells cannot take any other value.
+
+            Units whose cells lose values are examined again until nothing
+            changes.
+            @param k largest subset to look for
+            @param constraints units to examine, as in nakedPairs
+            @return false if some values of a unit have fewer cells left than
+                    values, true otherwise
+        """
+        if constraints is None:
+            constraints = self.network.getModifiedConstraints()
+        queue = deque(constraints)
+        queued = set(queue)
+
+        while queue:
+            unit = queue.popleft()
+            queued.discard(unit)
+
+            # cells of the unit each unplaced value can still go in
+            cells = []
+            placed = 0
+            for x in unit.vars:
+                if x.isAssigned():
+                    placed |= x.domain.bits
+                else:
+                    cells.append(x)
+            positions = [0] * (self.gameboard.N + 1)
+            for i, x in enumerate(cells):
+                bits = x.domain.bits & ~placed
+                while bits:
+                    low = bits & -bits
+                    positions[low.bit_length() - 1] |= 1 << i
+                    bits ^= low
+
+            values = []
+            masks = []
+            for val in range(1, self.gameboard.N + 1):
+                if (placed >> val) & 1:
                     continue
+                if positions[val] == 0:
+                    return False
+                if domain.popcount(positions[val]) <= k:
+                    values.append(val)
+                    masks.append(positions[val])
 
-                # var_c: variable to remove values from
-                for var_c in constraint.vars:
-
-                    # variable must be outside of pair
-                    if var_a is var_c or var_b is var_c:
-                        continue
-
-                    # union of domains must equal 3
-                    final_union = prelim_union | set(var_c.domain.values)
-                    if len(final_union) != 3:
-                        continue
-
-                    # var_d: variable to remove values from
-                    for var_d in constraint.vars:
-
-                        # variable must be outside of triple
-                        if var_a is var_d or var_b is var_d or var_c is var_d:
-                            continue
-
-                        altered_domain = False
-                        old_domain_size = var_d.domain.size()
-
-                        # all values to remove from variables in constraint
-                        for val in final_union:
-
-                            # if var is already assigned with the val to elim, inconsistency detected
-                            if var_d.isAssigned() and var_d.getAssignment() == val:
-                                return False
+            for chosen, union in subsets.findSubsets(masks, k):
+                if domain.popcount(union) < len(chosen):
+                    return False
 
-                            # Attempt to remove from var_d
-                            var_d.removeValueFromDomain(val)
+                keep = 0
+                for i in chosen:
+                    keep |= 1 << values[i]
+                members = [x for i, x in enumerate(cells) if (union >> i) & 1]
+                changed = self.restrictDomains(members, keep)
+                if changed is None:
+                    return False
+                if changed:
+                    self.queueUnitsOf(changed, queue, queued)
+                    break
 
-                        # if size difference, then domain has been altered
-                        altered_domain = var_d.domain.size() != old_domain_size
+        return True
 
-                        # if new cell is potentially part of naked pair, add constraints to set
-                        if altered_domain and var_c.domain.size() <= 3 and not var_c.isAssigned():
-                            for c in self.network.getConstraintsContainingVariable(var_d):
-                                constraint_set.add(c)
+    def restrictDomains(self, variables, keep):
+        """
+            Removes the values outside of the keep bitmask from the domains of
+            variables.
+            @return list of the variables that lost values, None if a domain
+                    would be wiped out
+        """
+        changed = []
+        for x in variables:
+            drop = x.domain.bits & ~keep
+            if not drop:
+                continue
+            if drop == x.domain.bits:
+                return None
+            for val in domain.Domain.fromBits(drop).values:
+                x.removeValueFromDomain(val)
+            changed.append(x)
+        return changed
+
+    def queueUnitsOf(self, variables, queue, queued):
+        """ adds the units of variables to a worklist of units, once each """
+        for x in variables:
+            for c in self.network.getConstraintsContainingVariable(x):
+                if c not in queued:
+                    queued.add(c)
+                    queue.append(c)
+
+    def hiddenSingles(self):
+        """
+            Hidden singles: a value that only one cell of a row, column or block
+            can still take is assigned to that cell. Each assignment is propagated
+            as in forward checking, and the units touched by the propagation are
+            examined again until no hidden single is left. Every change goes
+            through the trail, so it is undone with the node.
+
+            Only the units of the variables changed since the latest marker are
+            examined at first. When no marker has been placed yet, the assigned
+            variables are propagated first and every unit is examined.
+            @return false if some value has no cell left in a unit or an
+                    assignment conflicts with a neighbor, true at the fixpoint
+        """
+        full = (1 << (self.gameboard.N + 1)) - 2
+        if self.trail.trailMarker:
+            changed = [entry[0] for entry in self.trail.trailStack[self.trail.trailMarker[-1]:]]
+            queue = deque()
+            for v in changed:
+                queue.extend(self.network.getConstraintsContainingVariable(v))
+        else:
+            for v in self.network.variables:
+                if v.isAssigned() and self.propagateAssignment(v) is None:
+                    return False
+            queue = deque(self.network.constraints)
+        queued = set(queue)
+
+        while queue:
+            unit = queue.popleft()
+            queued.discard(unit)
+
+            # values seen at least once and at least twice in the unit
+            once = 0
+            twice = 0
+            for x in unit.vars:
+                bits = x.domain.bits
+                twice |= once & bits
+                once |= bits
+
+            # a value with no place left in the unit
+            if once != full:
+                return False
+
+            singles = once & ~twice
+            for x in unit.vars:
+                val_bit = x.domain.bits & singles
+                if not val_bit or x.isAssigned():
+                    continue
 
-                        # DEBUG: Assignment has been made
-                        if propagate and altered_domain and var_d.isAssigned():
+                # two hidden singles claim the same cell
+                if val_bit & (val_bit - 1):
+                    return False
 
-                            # not adding potential naked pair cells...
-                            consistent = self.forwardChecking()
-                            if not consistent:
-                                print("INC")
-                                return False
+                x.updateDomain(domain.Domain.fromBits(val_bit))
+                touched = self.propagateAssignment(x)
+                if touched is None:
+                    return False
+                for var in touched:
+                    for c in self.network.getConstraintsContainingVariable(var):
+                        if c not in queued:
+                            queued.add(c)
+                            queue.append(c)
 
         return True
 
+    def propagateAssignment(self, v):
+        """
+            Removes the value of the assigned variable v from its neighbors, and
+            carries on from every neighbor that becomes assigned on the way.
+            @return list of the variables whose domain changed, v included. None
+                    if a neighbor is already assigned the value to remove.
+        """
+        touched = [v]
+        to_check = [v]
+        while to_check:
+            var = to_check.pop()
+            val = var.getAssignment()
+            for neighbor in self.network.getNeighborsOfVariable(var):
+                if not neighbor.domain.contains(val):
+                    continue
+                if neighbor.isAssigned():
+                    return None
+                neighbor.removeValueFromDomain(val)
+                touched.append(neighbor)
+                if neighbor.isAssigned():
+                    to_check.append(neighbor)
+        return touched
+
     # Forward Checking: If you assign a variable X, if another variable Y is involved in a constraint with X, you prune
     # the domain of Y with any inconsistent values
     def forwardChecking(self):
@@ -308,37 +522,57 @@ class BTSolver:
 
     # Arc Consistency: For every pair of variables participating in constraints with each other, every value in one
     # variable's domain must be satisfiable by at least one value in the other variable's domain.
-    def arcConsistency(self):
+    def arcConsistency(self, start=None):
+        """
+            AC-3 over the binary not-equal arcs of the network, driven by a queue
+            of the variables changed at this node.
+
+            For x != y, a value a of x loses its support only when the domain of y
+            is exactly {a}, so revising the arcs (x, y) only does work once y is
+            down to a single value. The queue is seeded with the variables on the
+            trail since the latest marker (all variables when no marker has been
+            placed yet) and grows only with variables that become singletons, so
+            the cost follows the domain changes made at this node.
+
+            @param start trail position to seed the queue from, instead of the
+                         latest marker
+            @return false if a domain is wiped out, true at the fixpoint
+        """
+        if start is None and not self.trail.trailMarker:
+            seeds = self.network.variables
+        else:
+            if start is None:
+                start = self.trail.trailMarker[-1]
+            seeds = [entry[0] for entry in self.trail.trailStack[start:]]
 
-        # set of vars to check
-        to_check = set()
+        queue = deque()
+        queued = set()
+        for y in seeds:
+            if y not in queued and y.isAssigned():
+                queued.add(y)
+                queue.append(y)
 
-        # add all assigned variables to the set
-        for v in self.network.variables:
-            if v.isAssigned():
-                to_check.add(v)
+        while queue:
 
-        while len(to_check) > 0:
-
-            # get next variable to check
-            y = to_check.pop()
+            # revise every arc (x, y) pointing at the singleton y
+            y = queue.popleft()
             val = y.getAssignment()
 
-            # get all neighbors of the assigned var
             for x in self.network.getNeighborsOfVariable(y):
 
-                # if x is assigned with val to elim, inconsistency detected
-                if x.isAssigned() and x.getAssignment() == y.getAssignment():
+                if not x.domain.contains(val):
+                    continue
+
+                # removing the last value of x wipes its domain out
+                if x.isAssigned():
                     return False
 
-                # attempt to remove y value from x domain
-                old_domain_size = x.domain.size()
                 x.removeValueFromDomain(val)
-                domain_altered = x.domain.size() != old_domain_size
 
-                # if x has been assigned, add to to_check set
-                if x.isAssigned() and domain_altered:
-                    to_check.add(x)
+                # x lost a value: its own arcs only change if it became a singleton
+                if x.isAssigned() and x not in queued:
+                    queued.add(x)
+                    queue.append(x)
 
         return True
 
@@ -353,6 +587,8 @@ class BTSolver:
             return self.getMRV()
         elif self.varHeuristics == 2:
             return self.getDegree()
+        elif self.varHeuristics == 3:
+            return self.getMRVThenDegree()
         else:
             return self.getfirstUnassignedVariable()
 
@@ -367,61 +603,44 @@ class BTSolver:
         return None
 
     def getMRV(self):
-
-        # set return value to null
-        to_ret = None
-
-        # min is set to just above largest possible size
-        min = self.gameboard.N + 1
-
-        # visit all cells
-        for v in self.network.variables:
-
-            # search for the smallest domain among unassigned cells
-            if not v.isAssigned() and v.domain.size() < min:
-
-                # set the new min and return value
-                min = v.domain.size()
-                to_ret = v
-
-                # return if domain is smallest possible
-                if min <= MIN_DOMAIN:
-                    return to_ret
-
-        # returns null if all vars assigned
-        return to_ret
+        """
+            Minimum remaining values. Unassigned variables are kept in buckets
+            keyed by domain size and updated on every domain change and undo, so
+            only the smallest non-empty bucket is looked at. Ties go to the
+            variable that comes first in the network, or at random with
+            setRandom.
+            @return the variable with the fewest remaining values, None if all
+                    variables are assigned
+        """
+        if self.domainBuckets is None:
+            self.domainBuckets = domainbuckets.DomainBuckets(self.network, self.gameboard.N)
+        if self.tieRank is not None:
+            return self.domainBuckets.getMin(self.tieRank.__getitem__)
+        return self.domainBuckets.getMin()
 
     def getDegree(self):
+        """
+            Dynamic degree heuristic. The number of unassigned neighbors of every
+            variable is kept up to date on assignment and undo.
+            @return the unassigned variable with the most unassigned neighbors,
+                    None if all variables are assigned
+        """
+        if self.degreeCounts is None:
+            self.degreeCounts = degreecounts.DegreeCounts(self.network)
+        return self.degreeCounts.getMax()
 
-        # set return values to null
-        to_ret = None
-
-        max = -1
-        count = 0
-
-        # visit all cells
-        for v in self.network.variables:
-
-            # visit unassigned cells
-            if not v.isAssigned():
-
-                # tally number of contraints
-                count = len(self.network.getConstraintsContainingVariable(v))
-
-                # if largest, update the return value
-                if count > max:
-                    max = count
-                    to_ret = v
-
-                    # return if degree is largest possible
-                    if count >= self.maxDegree:
-                        return to_ret
-
-            # reset the degree count
-            count = 0
-
-        # returns null if all vars assigned
-        return to_ret
+    def getMRVThenDegree(self):
+        """
+            Minimum remaining values, with ties broken by the dynamic degree
+            heuristic.
+            @return the variable with the fewest remaining values and the most
+                    unassigned neighbors, None if all variables are assigned
+        """
+        if self.domainBuckets is None:
+            self.domainBuckets = domainbuckets.DomainBuckets(self.network, self.gameboard.N)
+        if self.degreeCounts is None:
+            self.degreeCounts = degreecounts.DegreeCounts(self.network)
+        return self.domainBuckets.getMin(self.degreeCounts.tieBreaker(self.tieRank))
 
     def getNextValues(self, v):
         """
@@ -440,30 +659,31 @@ class BTSolver:
         """
             Default value ordering.
             @param v Variable whose values need to be ordered
-            @return values ordered by lowest to highest.
+            @return values ordered by lowest to highest, or shuffled with
+                    setRandom.
         """
-        values = v.domain.values
-        return sorted(values)
+        values = sorted(v.domain.values)
+        if self.random is not None:
+            self.random.shuffle(values)
+        return values
 
     def getValuesLCVOrder(self, v):
-
-        # dictionary: { value : # of times appearing in neighbors' domains }
-        dict = {x:0 for x in v.domain.values}
-
-        # for all neighbors of variable v
-        for neighbor in self.network.getNeighborsOfVariable(v):
-
-            # for every value in neighbor domain
-            for val in neighbor.Values():
-
-                # if neighbors' domain includes val, increment score
-                try:
-                    dict[val] += 1
-                except:
-                    pass
-
-        # return list of values sorted by # of appearances in neighbors
-        return sorted(dict, key=dict.get)
+        """
+            Least constraining value. For every row, column and block, the number
+            of cells still allowing each value is kept up to date through domain
+            changes and undo, so the cost of a value is read from the units of v
+            instead of walking the domains of its neighbors.
+            @param v Variable whose values need to be ordered
+            @return values ordered by how few neighboring cells they rule out,
+                    lowest value first on ties, or at random with setRandom
+        """
+        if self.unitSupport is None:
+            self.unitSupport = unitsupport.UnitSupport(self.network, self.gameboard.N)
+        conflicts = self.unitSupport.conflicts
+        if self.random is not None:
+            rng = self.random
+            return sorted(v.domain.values, key=lambda val: (conflicts(v, val), rng.random()))
+        return sorted(v.domain.values, key=lambda val: conflicts(v, val))
 
     def success(self):
         """ Called when solver finds a solution """
@@ -492,83 +712,153 @@ class BTSolver:
     ######### Solver Method #########
     def solve(self):
         """ Method to start the solver """
+        # counting runs need the search, a cached solution only stands for one
+        useCache = self.cache is not None and self.solutionLimit == 1
+        if useCache and self.solveFromCache():
+            return
+        puzzle = self.gameboard
+
+        # arc consistency and hidden singles start from a fixpoint of the givens
+        consistent = True
+        self.preprocessing_startTime = time.time()
+        if self.cChecks == 2:
+            consistent = self.arcConsistency()
+        if consistent and self.heuristicChecks & HeuristicCheck['HS']:
+            consistent = self.hiddenSingles()
+        self.preprocessing_endTime = time.time()
+
         self.startTime = time.time()
         # try:
-        self.solveLevel(0)
+        if consistent:
+            # restarts would lose the count of the solutions found so far
+            if self.restartSchedule and self.solutionLimit == 1:
+                self.solveWithRestarts()
+            else:
+                if self.random is not None:
+                    self.shuffleTies()
+                self.solveLevel()
         # except:
         # print("Error with variable selection heuristic.")
         self.endTime = time.time()
-        # trail.masterTrailVariable.trailStack = []
         self.trail.trailStack = []
+        self.trail.trailMarker = []
+        if useCache and self.hassolution:
+            self.cache.store(puzzle, self.gameboard.board)
 
-
-    def solveLevel(self, level):
+    def solveFromCache(self):
         """
-            Solver Level
-            @param level How deep the solver is in its recursion.
-            @throws VariableSelectionException
-        contains some comments that can be uncommented for more in depth analysis
+            Looks the board up in the solution cache.
+            @return true if it was found, with the board holding its solution
         """
-        # print("=.=.=.=.=.=.=.=.=.=.=.=.=.=.=.=")
-        # print("BEFORE ANY SOLVE LEVEL START")
-        # print(self.network)
-        # print("=.=.=.=.=.=.=.=.=.=.=.=.=.=.=.=")
+        self.startTime = time.time()
+        board = self.cache.lookup(self.gameboard)
+        self.endTime = time.time()
+        if board is None:
+            return False
+        self.gameboard = gameboard.GameBoard(self.gameboard.N, self.gameboard.p, self.gameboard.q, board)
+        self.hassolution = True
+        self.numSolutions = 1
+        self.cacheHit = True
+        return True
 
-        if self.hassolution:
-            return
+    def solveWithRestarts(self):
+        """
+            Runs solveLevel under a node limit that follows the restart
+            schedule, starting over with new random tie breaking each time the
+            limit is reached. Every run starts from the fixpoint of the givens
+            left by solve, as solveLevel unwinds the trail back to it when it
+            gives up. The limits keep growing, so the search stays complete.
+        """
+        k = 0
+        while True:
+            k += 1
+            if self.restartSchedule == RestartSchedule['Luby']:
+                budget = self.restartBase * luby(k)
+            else:
+                budget = int(self.restartBase * RESTART_GROWTH ** (k - 1))
+            self.nodeLimit = self.numAssignments + budget
+            self.shuffleTies()
+            if self.solveLevel():
+                break
+            self.numRestarts += 1
+        self.nodeLimit = 0
+
+    def shuffleTies(self):
+        """ draws a new random order of the variables for the heuristics to break ties with """
+        self.tieRank = list(range(len(self.network.variables)))
+        self.random.shuffle(self.tieRank)
+
+    def solveLevel(self):
+        """
+            Backtracking search on an explicit stack, so the number of cells of
+            the board is not limited by the recursion limit. Each entry holds a
+            variable and the values of it still to try; the assignment of every
+            entry but the top one is the one the entries above it build on.
+
+            The search stops once solutionLimit solutions are found; the board
+            keeps the first one. Past the first, a solution is backtracked from
+            like a dead end.
+
+            With a nodeLimit, the search gives up before the assignment that
+            would exceed it, and undoes all of its assignments on the trail.
+            @return false if the search gave up on the node limit, true if it
+                    found its solutions or ran out of values
+            @throws ValueError if the variable selection stops early
+        """
+        trail = self.trail
+        stack = []
+        depth = len(trail.trailMarker)
+        nodeLimit = self.nodeLimit
 
-        # Select unassigned variable
         v = self.selectNextVariable()
-        # print("V SELECTED --> " + str(v))
-
-        # check if the assigment is complete
-        if (v == None):
-            # print("!!! GETTING IN V == NONE !!!")
-            for var in self.network.variables:
-                if not var.isAssigned():
-                    raise ValueError("Something happened with the variable selection heuristic")
-            self.success()
-            return
-
-        # loop through the values of the variable being checked LCV
-        # print("getNextValues(v): " + str(self.getNextValues(v)))
-        for i in self.getNextValues(v):
-            # print("next value to test --> " + str(i))
-            self.trail.placeTrailMarker()
-
-            # check a value
-            # print("-->CALL v.updateDomain(domain.Domain(i)) to start to test next value.")
-            v.updateDomain(domain.Domain(i))
-            self.numAssignments += 1
-
-            # move to the next assignment
-            if self.checkConsistency() and self.checkHeuristics():
-                self.solveLevel(level + 1)
-
-            # if this assignment failed at any stage, backtrack
-            if not self.hassolution:
-                # print("=======================================")
-                # print("AFTER PROCESSED:")
-                # print(self.network)
-                # print("================ ")
-                # print("self.trail before revert change: ")
-                for i in self.trail.trailStack:
-                    pass
-                    # print("variable --> " + str(i[0]))
-                    # print("domain backup --> " + str(i[1]))
-                # print("================= ")
-
-                self.trail.undo()
+        while True:
+            # check if the assigment is complete
+            if v is None:
+                for var in self.network.variables:
+                    if not var.isAssigned():
+                        raise ValueError("Something happened with the variable selection heuristic")
+                self.numSolutions += 1
+                if self.numSolutions == 1:
+                    self.success()
+                if self.numSolutions == self.solutionLimit or not stack:
+                    return True
+                # keep counting: give up the assignment that completed the board
+                trail.undo()
+                self.restoreFlags()
                 self.numBacktracks += 1
-                # print("REVERT CHANGES:")
-                # print(self.network)
-                # print("================ ")
-                # print("self.trail after revert change: ")
-                for i in self.trail.trailStack:
-                    pass
-                    # print("variable --> " + str(i[0]))
-                    # print("domain backup --> " + str(i[1]))
-                # print("================= ")
-
             else:
-                return
+                stack.append((v, iter(self.getNextValues(v))))
+
+            v = None
+            while stack:
+                var, values = stack[-1]
+                for i in values:
+                    if nodeLimit and self.numAssignments >= nodeLimit:
+                        while len(trail.trailMarker) > depth:
+                            trail.undo()
+                        self.restoreFlags()
+                        return False
+                    trail.placeTrailMarker()
+                    var.updateDomain(domain.Domain(i))
+                    self.numAssignments += 1
+
+                    # move to the next assignment
+                    if self.checkConsistency() and self.checkHeuristics():
+                        v = self.selectNextVariable()
+                        break
+
+                    # this assignment failed, backtrack
+                    trail.undo()
+                    self.restoreFlags()
+                    self.numBacktracks += 1
+                else:
+                    # out of values: undo the assignment this entry built on
+                    stack.pop()
+                    if stack:
+                        trail.undo()
+                        self.restoreFlags()
+                        self.numBacktracks += 1
+                    continue
+                break
+            else:
+                return True
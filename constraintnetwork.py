@@ -3,6 +3,7 @@
 
 import variable
 import constraint
+import trail
 # import assignment
 
 class ConstraintNetwork:
@@ -10,18 +11,96 @@ class ConstraintNetwork:
         """
             CSP representation of the problem. Contains the variables, constraints, and
             many helpful accessors.
+
+            Each network owns the trail its variables record their changes on and
+            the counter used to name them, so independent networks can be solved
+            side by side in one process.
         """
         self.constraints = []
         self.variables = []
+        self.trail = trail.Trail()
+        self.namingCounter = 1
+        self.domainListeners = [self.variableModified]
+        self.modifiedVariables = set()  # variables changed since getModifiedConstraints last reset them
+
+        # per-variable adjacency, built once by indexVariables()
+        self.neighborsOf = dict()
+        self.constraintsOf = dict()
+        self.constraintOrder = dict()
+        self.indexed = False
 
     ######### Modifiers Method #########
     def addConstraint(self, c):
         if c not in self.constraints:
             self.constraints.append(c)
+            self.indexed = False
 
     def addVariable(self, v):
         if v not in self.variables:
+            v.index = len(self.variables)
+            v.domainListeners = self.domainListeners
             self.variables.append(v)
+            self.indexed = False
+            if v.modified:
+                self.modifiedVariables.add(v)
+
+    def variableModified(self, v, oldBits, oldCount):
+        """ domain listener recording the variables to report in getModifiedConstraints """
+        self.modifiedVariables.add(v)
+
+    def setModified(self, variables):
+        """ flags the variables modified again, so getModifiedConstraints reports them """
+        for v in variables:
+            v.setModified(True)
+            self.modifiedVariables.add(v)
+
+    def addDomainListener(self, listener):
+        """
+            Registers listener(variable, oldBits, oldCount) to be called after the
+            domain of any variable of the network changes, undo included.
+        """
+        self.domainListeners.append(listener)
+
+    def newVariable(self, possible_Values, row, col, block):
+        """
+            Creates a variable named from this network's counter and recording on
+            this network's trail, and adds it to the network.
+            @return the new variable
+        """
+        v = variable.Variable(possible_Values, row, col, block,
+                              "v" + str(self.namingCounter), self.trail)
+        self.namingCounter += 1
+        self.addVariable(v)
+        return v
+
+    def indexVariables(self):
+        """
+            Builds the neighbor list and the list of constraints containing each
+            variable, so the accessors below answer without scanning every
+            constraint. Called once the network is complete; adding a variable
+            or a constraint afterwards marks the index stale and it is rebuilt
+            on the next lookup.
+        """
+        self.constraintsOf = dict()
+        self.constraintOrder = dict((c, i) for i, c in enumerate(self.constraints))
+        for v in self.variables:
+            self.constraintsOf[v] = []
+        for c in self.constraints:
+            for v in c.vars:
+                self.constraintsOf.setdefault(v, []).append(c)
+
+        self.neighborsOf = dict()
+        for v in self.constraintsOf:
+            neighbors = []
+            seen = set([v])
+            for c in self.constraintsOf[v]:
+                for x in c.vars:
+                    if x not in seen:
+                        seen.add(x)
+                        neighbors.append(x)
+            self.neighborsOf[v] = neighbors
+
+        self.indexed = True
 
     # def pushAssignment(self, a):
     #     """
@@ -32,13 +111,14 @@ class ConstraintNetwork:
 
     ######### Accessors Method #########
     def getNeighborsOfVariable(self, v):
-        neighbors = set()
-        for c in self.constraints:
-            if c.contains(v):
-                for x in c.vars:
-                    neighbors.add(x)
-        neighbors.remove(v)
-        return list(neighbors)
+        """
+            @param v variable to check
+            @return list of variables sharing a constraint with v. The list is
+                    shared by the index and must not be modified by the caller.
+        """
+        if not self.indexed:
+            self.indexVariables()
+        return self.neighborsOf[v]
 
     # def isConsistent(self):
     #     """
@@ -51,15 +131,14 @@ class ConstraintNetwork:
     def getConstraintsContainingVariable(self, v):
         """
             @param v variable to check
-            @return list of constraints that contains v
+            @return list of constraints that contains v. The list is shared by
+                    the index and must not be modified by the caller.
         """
-        outList = []
-        for c in self.constraints:
-            if c.contains(v):
-                outList.append(c)
-        return outList
+        if not self.indexed:
+            self.indexVariables()
+        return self.constraintsOf[v]
 
-    def getModifiedConstraints(self):
+    def getModifiedConstraints(self, reset=True):
         """
             Returns the constraints that contain variables whose domains were
             modified since the last call to this method.
@@ -70,17 +149,23 @@ class ConstraintNetwork:
             Note* The first call to this method returns the constraints containing
             the initialized variables.
 
-            @return ArrayList of modified constraints
-        """
-        mConstraints = []
-        for c in self.constraints:
-            if c.isModified():
-                mConstraints.append(c)
+            The modified variables are recorded by a domain listener as they
+            change, so the cost depends on how many changed, not on the size of
+            the network.
 
-        for v in self.variables:
-            v.setModified(False)
-
-        return mConstraints
+            @param reset false to leave the variables modified, so the next call
+                         reports them again
+            @return ArrayList of modified constraints, in network order
+        """
+        modified = set()
+        for v in self.modifiedVariables:
+            modified.update(self.getConstraintsContainingVariable(v))
+            if reset:
+                v.setModified(False)
+        if reset:
+            self.modifiedVariables = set()
+
+        return sorted(modified, key=self.constraintOrder.__getitem__)
 
     ######### String Representation #########
     def __str__(self):
@@ -0,0 +1,67 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+class DegreeCounts:
+    def __init__(self, network):
+        """
+            Keeps, for every variable of a network, the number of its neighbors
+            that are still unassigned, along with the set of unassigned variables.
+
+            The counts listen to every domain change of the network, so they
+            follow assignments made by the search and by propagation as well as
+            the ones undone by the trail. Variables are referred to by their index
+            in the network.
+        """
+        self.network = network
+        self.variables = network.variables
+        self.unassigned = set()
+        self.counts = [0] * len(network.variables)
+        for v in network.variables:
+            if not v.isAssigned():
+                self.unassigned.add(v.index)
+            self.counts[v.index] = len([x for x in network.getNeighborsOfVariable(v)
+                                        if not x.isAssigned()])
+        network.addDomainListener(self.domainChanged)
+
+    ######### Modifiers Method #########
+    def domainChanged(self, v, oldBits, oldCount):
+        wasAssigned = oldCount == 1
+        if wasAssigned == (v.domain.count == 1):
+            return
+
+        counts = self.counts
+        if wasAssigned:
+            delta = 1
+            self.unassigned.add(v.index)
+        else:
+            delta = -1
+            self.unassigned.discard(v.index)
+        for x in self.network.getNeighborsOfVariable(v):
+            counts[x.index] += delta
+
+    ######### Accessors Method #########
+    def degree(self, v):
+        """ @return the number of unassigned neighbors of v """
+        return self.counts[v.index]
+
+    def getMax(self):
+        """
+            @return the unassigned variable with the most unassigned neighbors,
+                    the first one in the network on ties. None if every variable
+                    is assigned.
+        """
+        if not self.unassigned:
+            return None
+        return self.variables[min(self.unassigned, key=self.tieBreaker())]
+
+    def tieBreaker(self, rank=None):
+        """
+            @param rank order of the variables breaking the ties left, by index.
+                        Defaults to the order of the variables in the network.
+            @return a key over variable indices ordering the most constrained
+                    variables first, for breaking ties of another heuristic
+        """
+        counts = self.counts
+        if rank is not None:
+            return lambda i: (-counts[i], rank[i])
+        return lambda i: (-counts[i], i)
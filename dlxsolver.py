@@ -0,0 +1,328 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import gameboard
+import time
+
+class DLXSolver:
+    "Dancing Links (Algorithm X) exact cover solver"
+
+    ######### Constructors Method #########
+    def __init__(self, gb):
+        """
+            Solves a board as an exact cover problem. Every candidate (row, col,
+            value) is a row of the cover matrix; it covers one column for its
+            cell, one for the value in its row, one for the value in its column
+            and one for the value in its block, so any p x q block shape works.
+
+            The matrix is kept as dancing links in flat lists of node indices,
+            and the search runs on an explicit stack so the depth of the board
+            does not matter. Exposes the same fields as BTSolver so
+            main.printSolverStats can report on it.
+        """
+        self.hassolution = False
+        self.gameboard = gb
+
+        self.numAssignments = 0
+        self.numBacktracks = 0
+        self.numSolutions = 0
+        self.solutionLimit = 1  # stop after this many solutions, 0 to count them all
+        self.preprocessing_startTime = 0
+        self.preprocessing_endTime = 0
+        self.startTime = None
+        self.endTime = None
+        self.profile = None  # BTSolver only
+
+        self.random = None  # random number generator shuffling the value order, see setRandom
+        self.rowStart = None  # first node of the matrix row of each (row, col, value)
+        self.placed = []  # row nodes selected outside of the search, latest last
+
+        self.tokens = []  # tokens(heuristics to use)
+
+    ######### Modifiers Method #########
+    def setTokens(self, tokens):
+        ''' set the set of heuristics to be taken into consideration'''
+        self.tokens = tokens
+
+    def setSolutionLimit(self, limit):
+        '''modify the number of solutions to find before stopping, 0 for all of them'''
+        self.solutionLimit = limit
+
+    def setRandom(self, rng):
+        '''
+            try the values of every cell in an order drawn from rng (a
+            random.Random) instead of ascending, so each search finds a
+            different solution first. Applies to matrices built afterwards.
+        '''
+        self.random = rng
+
+    ######### Accessors Method #########
+    def getSolution(self):
+        return self.gameboard
+
+    # @return time required for the solver to attain in seconds
+    def getTimeTaken(self):
+        return self.endTime - self.startTime
+
+    ######### Helper Method #########
+    def buildMatrix(self):
+        """
+            Links the cover matrix of the board. Node 0 is the root, nodes 1 to
+            4 * N * N are the column headers, and every candidate adds four
+            nodes linked into a ring. Sets rowStart, mapping (row, col, value)
+            to the first node of its matrix row.
+        """
+        N = self.gameboard.N
+        p = self.gameboard.p
+        q = self.gameboard.q
+        cells = N * N
+        numColumns = 4 * cells
+
+        # headers ring: 0 <-> 1 <-> ... <-> numColumns <-> 0
+        self.L = [i - 1 for i in range(numColumns + 1)]
+        self.R = [i + 1 for i in range(numColumns + 1)]
+        self.L[0] = numColumns
+        self.R[numColumns] = 0
+        self.U = list(range(numColumns + 1))
+        self.D = list(range(numColumns + 1))
+        self.C = list(range(numColumns + 1))
+        self.S = [0] * (numColumns + 1)
+        self.candidate = [None] * (numColumns + 1)
+
+        self.rowStart = dict()
+        self.placed = []
+        values = list(range(1, N + 1))
+        for i in range(N):
+            for j in range(N):
+                block = (i // p) * p + j // q
+                if self.random is not None:
+                    self.random.shuffle(values)
+                for v in values:
+                    columns = (1 + i * N + j,
+                               1 + cells + i * N + v - 1,
+                               1 + 2 * cells + j * N + v - 1,
+                               1 + 3 * cells + block * N + v - 1)
+                    first = len(self.C)
+                    for k, c in enumerate(columns):
+                        node = first + k
+                        self.C.append(c)
+                        self.candidate.append((i, j, v))
+                        self.L.append(first + (k - 1) % 4)
+                        self.R.append(first + (k + 1) % 4)
+                        self.U.append(self.U[c])
+                        self.D.append(c)
+                        self.D[self.U[c]] = node
+                        self.U[c] = node
+                        self.S[c] += 1
+                    self.rowStart[(i, j, v)] = first
+
+    def rowNodes(self, r):
+        """ @return the four nodes of the matrix row starting at node r """
+        return [r, self.R[r], self.R[self.R[r]], self.L[r]]
+
+    def isCovered(self, c):
+        """ @return true if column c has been taken out of the header ring """
+        return self.R[self.L[c]] != c
+
+    def cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def selectRow(self, r):
+        """ covers the other columns of the matrix row of node r """
+        j = self.R[r]
+        while j != r:
+            self.cover(self.C[j])
+            j = self.R[j]
+
+    def deselectRow(self, r):
+        """ undoes selectRow(r) """
+        j = self.L[r]
+        while j != r:
+            self.uncover(self.C[j])
+            j = self.L[j]
+
+    def chooseColumn(self):
+        """ @return the uncovered column with the fewest rows left """
+        R, S = self.R, self.S
+        best = R[0]
+        c = R[best]
+        while c != 0 and S[best] > 1:
+            if S[c] < S[best]:
+                best = c
+            c = R[c]
+        return best
+
+    def placeCandidate(self, i, j, v):
+        """
+            Selects the matrix row of value v in cell (i, j) ahead of the
+            search, as for a given. Placements are undone in reverse order with
+            unplaceCandidate.
+            @return false, changing nothing, if the value clashes with a
+                    placement already made
+        """
+        r = self.rowStart[(i, j, v)]
+        columns = [self.C[node] for node in self.rowNodes(r)]
+        # a candidate is only reachable while none of its columns is covered
+        for c in columns:
+            if self.isCovered(c):
+                return False
+        for c in columns:
+            self.cover(c)
+        self.placed.append(r)
+        return True
+
+    def unplaceCandidate(self):
+        """
+            Undoes the latest placeCandidate.
+            @return the (row, col, value) that was placed
+        """
+        r = self.placed.pop()
+        for node in reversed(self.rowNodes(r)):
+            self.uncover(self.C[node])
+        return self.candidate[r]
+
+    def hideCandidate(self, i, j, v):
+        """
+            Takes value v of cell (i, j) out of the matrix, so no solution can
+            use it, until unhideCandidate. None of its columns may be covered.
+        """
+        U, D, C, S = self.U, self.D, self.C, self.S
+        for node in self.rowNodes(self.rowStart[(i, j, v)]):
+            D[U[node]] = D[node]
+            U[D[node]] = U[node]
+            S[C[node]] -= 1
+
+    def unhideCandidate(self, i, j, v):
+        """ undoes hideCandidate(i, j, v) """
+        U, D, C, S = self.U, self.D, self.C, self.S
+        for node in reversed(self.rowNodes(self.rowStart[(i, j, v)])):
+            S[C[node]] += 1
+            D[U[node]] = node
+            U[D[node]] = node
+
+    def placeGivens(self):
+        """
+            Places the filled cells of the board.
+            @return false if two givens clash
+        """
+        board = self.gameboard.board
+        N = self.gameboard.N
+        for i in range(N):
+            for j in range(N):
+                if board[i][j] != 0 and not self.placeCandidate(i, j, board[i][j]):
+                    return False
+        return True
+
+    def success(self, rows):
+        """ Called when solver finds a solution """
+        self.hassolution = True
+        N = self.gameboard.N
+        board = [[0 for j in range(N)] for i in range(N)]
+        for r in self.placed + rows:
+            i, j, v = self.candidate[r]
+            board[i][j] = v
+        self.gameboard = gameboard.GameBoard(N, self.gameboard.p, self.gameboard.q, board)
+
+    ######### Solver Method #########
+    def solve(self):
+        """ Method to start the solver """
+        self.preprocessing_startTime = time.time()
+        self.buildMatrix()
+        consistent = self.placeGivens()
+        self.preprocessing_endTime = time.time()
+
+        self.startTime = time.time()
+        if consistent:
+            self.search()
+        self.endTime = time.time()
+
+    def countSolutions(self, limit):
+        """
+            Searches the matrix as it stands, with the placements and hidden
+            candidates made so far, and leaves it that way.
+            @param limit number of solutions to stop at, 0 to count them all
+            @return the number of solutions found
+        """
+        self.numSolutions = 0
+        self.solutionLimit = limit
+        self.search()
+        return self.numSolutions
+
+    def search(self):
+        """
+            Algorithm X on an explicit stack. Each entry holds a chosen column
+            and the row node currently selected for it; selecting a row counts
+            as an assignment and giving it up as a backtrack, as in BTSolver.
+            Stops after solutionLimit solutions, keeping the first one, and
+            unwinds its selections before returning.
+        """
+        R, D = self.R, self.D
+        stack = []
+        descend = True
+
+        while True:
+            if descend:
+                if R[0] == 0:
+                    self.numSolutions += 1
+                    if self.numSolutions == 1:
+                        self.success([r for c, r in stack])
+                    if self.numSolutions == self.solutionLimit:
+                        break
+                else:
+                    c = self.chooseColumn()
+                    if D[c] != c:
+                        self.cover(c)
+                        r = D[c]
+                        self.selectRow(r)
+                        self.numAssignments += 1
+                        stack.append((c, r))
+                        continue
+
+            # dead end or solution to count past: give up the latest row and
+            # try the next one for its column
+            descend = False
+            while stack:
+                c, r = stack.pop()
+                self.deselectRow(r)
+                self.numBacktracks += 1
+                r = D[r]
+                if r != c:
+                    self.selectRow(r)
+                    self.numAssignments += 1
+                    stack.append((c, r))
+                    descend = True
+                    break
+                self.uncover(c)
+
+            if not descend:
+                return
+
+        while stack:
+            c, r = stack.pop()
+            self.deselectRow(r)
+            self.uncover(c)
@@ -1,35 +1,65 @@
 # Submitter: tryond(tryon, daniel) 20621204
 # Partner: joshuaek(klein, joshua) 58485794
 
-class Domain:
+def popcount(bits):
+    """ number of values held by a domain bitmask """
+    return bin(bits).count("1")
+
+class Domain(object):
     def __init__(self, value_or_values):
         """
             Represents the domain of a variable, i.e. the possible values that each
             variable may assign.
+
+            Values are held in an integer bitmask where bit v is set when value v
+            is in the domain, so remove, contains, size, equality and union are
+            single integer operations. The values attribute is a sorted list view
+            of the mask for callers that iterate over the domain.
         """
-        self.values = []
+        self.bits = 0
+        self.count = 0
         if type(value_or_values) is int:
-            self.values.append(value_or_values)
+            self.add(value_or_values)
         else: # type list
-            self.values = value_or_values
+            self.copy(value_or_values)
 
         self.modified = False
 
+    @classmethod
+    def fromBits(cls, bits):
+        """ Builds a domain straight from a bitmask. """
+        d = cls([])
+        d.bits = bits
+        d.count = popcount(bits)
+        return d
+
     ######### Constructors/Modified Method #########
     def copy(self, values):
-        self.values = values
+        self.bits = 0
+        self.count = 0
+        for num in values:
+            self.add(num)
 
     def add(self, num):
-        self.values.append(num)
+        bit = 1 << num
+        if not self.bits & bit:
+            self.bits |= bit
+            self.count += 1
 
     def remove(self, num):
-        if num in self.values:
+        bit = 1 << num
+        if self.bits & bit:
             self.modified = True
-            self.values.remove(num)
+            self.bits ^= bit
+            self.count -= 1
             return True
         else:
             return False
 
+    def union(self, other):
+        """ @return a new domain holding the values of both domains """
+        return Domain.fromBits(self.bits | other.bits)
+
     ######### Accessors Method #########
     def contains(self, v):
         """
@@ -37,14 +67,30 @@ class Domain:
             @param value to check
             @return true if <tt>value</tt> exists within the domain, false otherwise.
         """
-        return v in self.values
+        return (self.bits >> v) & 1 == 1
 
     def size(self):
-        return len(self.values)
+        return self.count
 
     def isEmpty(self):
         """ return true if no values are contained in the domain. """
-        return not self.values
+        return self.bits == 0
+
+    def lowest(self):
+        """ @return the smallest value in the domain, 0 if the domain is empty """
+        return (self.bits & -self.bits).bit_length() - 1 if self.bits else 0
+
+    def getValues(self):
+        """ @return the values in the domain, lowest to highest """
+        values = []
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            values.append(low.bit_length() - 1)
+            bits ^= low
+        return values
+
+    values = property(getValues, copy)
 
     def isModified(self):
         """
@@ -53,20 +99,18 @@ class Domain:
         """
         return self.modified
 
+    def __eq__(self, other):
+        return isinstance(other, Domain) and self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
     ######### String Representation #########
     def __str__(self):
         """
             String Representation method to print Domain values encapsulated
             inside {}
         """
-        output = "{"
-        for i in range(len(self.values) - 1):
-            output += str(self.values[i]) + ", "
-        try:
-            output += str(self.values[-1])
-        except:
-            pass
-
-        output += "}"
-        return output
-        # return str(self.values)
+        return "{" + ", ".join(str(v) for v in self.values) + "}"
@@ -0,0 +1,78 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import heapq
+
+class DomainBuckets:
+    def __init__(self, network, N):
+        """
+            Keeps the unassigned variables of a network in buckets keyed by the
+            size of their domain, so the minimum remaining values variable is
+            found without scanning the network.
+
+            The buckets listen to every domain change of the network, including
+            the ones undone by the trail, so they stay current while the solver
+            backtracks. Variables with a domain of size 1 are assigned and are
+            not kept; neither are wiped out variables. Buckets hold the index of
+            each variable in the network.
+
+            Each bucket also keeps a heap of its indices, so the first variable
+            of the smallest bucket is read off its head. Indices leaving a
+            bucket stay in its heap until they reach the head, and the heap is
+            rebuilt once stale indices outnumber the live ones.
+        """
+        self.variables = network.variables
+        self.buckets = [set() for i in range(N + 1)]
+        for v in network.variables:
+            if v.size() > 1:
+                self.buckets[v.size()].add(v.index)
+        self.heaps = [sorted(bucket) for bucket in self.buckets]
+        network.addDomainListener(self.domainChanged)
+
+    ######### Modifiers Method #########
+    def domainChanged(self, v, oldBits, oldCount):
+        newCount = v.domain.count
+        if oldCount != newCount:
+            buckets = self.buckets
+            if oldCount > 1:
+                buckets[oldCount].discard(v.index)
+            if newCount > 1 and v.index not in buckets[newCount]:
+                buckets[newCount].add(v.index)
+                heap = self.heaps[newCount]
+                if len(heap) > 2 * len(buckets[newCount]) + 16:
+                    self.heaps[newCount] = sorted(buckets[newCount])
+                else:
+                    heapq.heappush(heap, v.index)
+
+    ######### Accessors Method #########
+    def smallest(self):
+        """
+            @return the size of the smallest non-empty bucket, 0 if every
+                    variable is assigned
+        """
+        buckets = self.buckets
+        for size in range(2, len(buckets)):
+            if buckets[size]:
+                return size
+        return 0
+
+    def getMin(self, key=None):
+        """
+            @param key tie breaker applied to variable indices: the lowest key
+                       in the smallest bucket is chosen. Defaults to the order
+                       of the variables in the network.
+            @return the minimum remaining values variable, None if every
+                    variable is assigned. Without a key it is the head of the
+                    heap of the bucket; a key has to be applied to the whole
+                    bucket.
+        """
+        size = self.smallest()
+        if not size:
+            return None
+        bucket = self.buckets[size]
+        if key is not None:
+            return self.variables[min(bucket, key=key)]
+        heap = self.heaps[size]
+        while heap[0] not in bucket:
+            heapq.heappop(heap)
+        return self.variables[heap[0]]
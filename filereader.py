@@ -1,6 +1,7 @@
 # Submitter: tryond(tryon, daniel) 20621204
 # Partner: joshuaek(klein, joshua) 58485794
 
+import sys
 import gameboard
 import constraint
 import constraintnetwork
@@ -13,6 +14,12 @@ ODOMETERTOINT = {"0":0,"1":1,"2":2,"3":3,"4":4,"5":5,"6":6,"7":7,"8":8,"9":9,
                  "J":19,"K":20,"L":21,"M":22,"N":23,"O":24,"P":25,"Q":26,"R":27,
                  "S":28,"T":29,"U":30,"V":31,"W":32,"X":33,"Y":34,"Z":35}
 
+# largest N a board can have, each value written as one character
+MAXN = max(ODOMETERTOINT.values())
+
+# one-line puzzles: number of characters -> (N, p = q)
+ONELINESIZES = {16:(4,2), 81:(9,3), 256:(16,4), 625:(25,5)}
+
 def SudokuFileReader(filePath):
     '''read from input file and generate gameboard'''
     with open(filePath) as f:
@@ -41,7 +48,142 @@ def SudokuFileReader(filePath):
 
             return gameboard.GameBoard(N,p,q,board)
 
+def SudokuStreamReader(source, skipErrors=False):
+    '''
+        Reads the puzzles of a file one at a time, so files holding any number
+        of them are read in constant memory. A file can mix:
+          * an "N p q" line followed by N rows, as read by SudokuFileReader
+          * a "Grid ..." title line followed by the rows of a square board
+            written without spaces, as in Project Euler problem 96
+          * one puzzle per line, written without spaces: 16, 81, 256 or 625
+            characters for a 4x4, 9x9, 16x16 or 25x25 board
+        Empty cells are 0 (or . without spaces); values above 9 are letters.
+        Lines starting with # are comments.
+        @param source a file path, an open file, or "-" for stdin
+        @param skipErrors yield the ValueError of a malformed puzzle in its
+                          place and go on with the next puzzle, instead of
+                          raising it
+        @return generator of GameBoards
+    '''
+    if source == "-":
+        for gb in readPuzzles(sys.stdin, skipErrors):
+            yield gb
+    elif hasattr(source, "read"):
+        for gb in readPuzzles(source, skipErrors):
+            yield gb
+    else:
+        with open(source) as f:
+            for gb in readPuzzles(f, skipErrors):
+                yield gb
+
 ######### HELPER FUNTION #########
+def readPuzzles(f, skipErrors=False):
+    '''
+        generator of the GameBoards of the lines of f, see SudokuStreamReader.
+        After a malformed puzzle, with skipErrors, the lines up to the first
+        line of the next puzzle are skipped. Past a puzzle of several lines,
+        whose rows can look like one-line puzzles, only an "N p q" or a "Grid"
+        line starts the next one.
+    '''
+    lines = iter(f)
+    skipping = None  # test of the line the next puzzle starts at, after an error
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        if skipping is not None and not skipping(line):
+            continue
+        skipping = None
+
+        try:
+            gb = readPuzzle(line, lines)
+        except ValueError as e:
+            if not skipErrors:
+                raise
+            skipping = isPuzzleLine if isOneLinePuzzle(line) else isPuzzleHeader
+            yield e
+            continue
+        yield gb
+
+
+def readPuzzle(line, lines):
+    ''' @return the GameBoard starting at line, reading its rows from lines '''
+    fields = line.split()
+    if len(fields) == 3 and all(x.isdigit() for x in fields):
+        N, p, q = [int(x) for x in fields]
+        if not isBoardSize(N, p, q):
+            raise ValueError("Invalid board parameters \"" + line.strip() + "\": N must be p * q, from 1 to "
+                             + str(MAXN))
+        board = [parseRow(nextRow(lines), N) for i in range(N)]
+    elif fields[0] == "Grid":
+        first = nextRow(lines).strip()
+        N = len(first)
+        p = int(round(N ** 0.5))
+        if p * p != N:
+            raise ValueError("Rows of " + str(N) + " cells do not make a square board")
+        q = p
+        board = [parseRow(first, N)] + [parseRow(nextRow(lines), N) for i in range(N - 1)]
+    elif len(fields) == 1 and len(fields[0]) in ONELINESIZES:
+        N, p = ONELINESIZES[len(fields[0])]
+        q = p
+        board = [parseRow(fields[0][i * N:(i + 1) * N], N) for i in range(N)]
+    else:
+        raise ValueError("Unrecognized puzzle line \"" + line.strip() + "\"")
+
+    return gameboard.GameBoard(N,p,q,board)
+
+
+def isPuzzleLine(line, checkSize=True):
+    ''' @return true if line looks like the first line of a puzzle, see isPuzzleHeader '''
+    return isPuzzleHeader(line, checkSize) or isOneLinePuzzle(line)
+
+
+def isPuzzleHeader(line, checkSize=True):
+    '''
+        @return true if line is the "N p q" or "Grid" line of a puzzle of several lines
+        @param checkSize only take "N p q" lines giving a valid board size, so
+                         a row of three values is not taken for one
+    '''
+    params = line.split()
+    if len(params) == 3 and all(x.isdigit() for x in params):
+        return not checkSize or isBoardSize(*[int(x) for x in params])
+    return bool(params) and params[0] == "Grid"
+
+
+def isBoardSize(N, p, q):
+    ''' @return true if an N x N board can have blocks of p rows and q columns '''
+    return 1 <= N <= MAXN and N == p * q
+
+
+def isOneLinePuzzle(line):
+    ''' @return true if line is a whole puzzle written on one line '''
+    params = line.split()
+    return len(params) == 1 and len(params[0]) in ONELINESIZES
+
+
+def nextRow(lines):
+    ''' @return the next non-blank line '''
+    for line in lines:
+        if line.strip():
+            return line
+    raise ValueError("Incomplete board at the end of the input")
+
+
+def parseRow(line, N):
+    ''' @return the N values of one board row, written with or without spaces '''
+    fields = line.split()
+    if len(fields) == 1 and N > 1:
+        fields = list(fields[0])
+    if len(fields) != N:
+        raise ValueError("Expected a row of " + str(N) + " cells, got \"" + line.strip() + "\"")
+    row = [0 if x == "." else ODOMETERTOINT.get(x.upper(), -1) for x in fields]
+    for x in row:
+        if not 0 <= x <= N:
+            raise ValueError("Row \"" + line.strip() + "\" holds a value outside 0 to " + str(N))
+    return row
+
+
+
 def checkGameBoardParameters(params):
     if len(params.split()) != 3:
         raise ValueError("Params invalid in file.")
@@ -49,6 +191,7 @@ def checkGameBoardParameters(params):
 
 def GameBoardToConstraintNetwork(gb):
 	board = gb.board
+	cn = constraintnetwork.ConstraintNetwork()
 	variables = []
 	value = 0
 
@@ -65,7 +208,7 @@ def GameBoardToConstraintNetwork(gb):
 				domain.append(value)
 
 			block = int(((floor(i/gb.p) * gb.p) + floor(j/gb.q)))
-			variables.append(variable.Variable(domain,i,j,block))
+			variables.append(cn.newVariable(domain,i,j,block))
 
 	rows = dict()
 	cols = dict()
@@ -87,10 +230,6 @@ def GameBoardToConstraintNetwork(gb):
 		cols[col].append(v)
 		blocks[block].append(v)
 
-	cn = constraintnetwork.ConstraintNetwork()
-	for v in variables:
-		cn.addVariable(v)
-
 	for e in rows:
 		c = constraint.Constraint()
 		for v in rows[e]:
@@ -109,6 +248,7 @@ def GameBoardToConstraintNetwork(gb):
 			c.addVariable(v)
 		cn.addConstraint(c)
 
+	cn.indexVariables()
 	return cn
 
 
@@ -5,55 +5,200 @@
 
 import sys
 import signal
+import random
 import gameboard
 import filereader
 import constraint
 import constraintnetwork
 import btsolver
+import dlxsolver
+import portfoliosolver
+import solutioncache
 import time
 
 
+class TimeoutException(Exception):
+    pass
+
+
 def signal_handler(signum, frame):
     """ Limit excution time of a function call """
-    raise Exception("Timed out!")
+    raise TimeoutException("Timed out!")
+
+
+def createSolver(gb, tokens):
+    """
+        @return a PortfolioSolver for the PORTFOLIO token, a DLXSolver for the
+                DLX token, a BTSolver otherwise. The tokens still have to be
+                applied with setSolverTokens.
+    """
+    if 'PORTFOLIO' in tokens:
+        return portfoliosolver.PortfolioSolver(gb, portfoliosolver.portfolioConfigurations(tokens))
+    if 'DLX' in tokens:
+        return dlxsolver.DLXSolver(gb)
+    return btsolver.BTSolver(gb)
+
+
+def setSolverTokens(solver, tokens, verbose=True):
+    """
+        Sets the consistency checks and heuristics of solver from the command
+        line tokens.
+        @param solver a BTSolver, or a DLXSolver or PortfolioSolver which only
+                      take the solution limit
+        @param verbose print the name of every option that gets turned on
+    """
+    def report(name):
+        if verbose:
+            print(name)
 
+    solver.setTokens(tokens)
 
-def printSolverStats(solverObj,totalStart,isTimeOut):
-    output = "TOTAL_START=" + str(time.asctime(time.localtime(totalStart)))
+    # UNIQUE stops at a second solution, COUNT counts them all and COUNT<k>
+    # stops after k of them
+    for token in tokens:
+        if token == 'UNIQUE':
+            report('Uniqueness check')
+            solver.setSolutionLimit(2)
+        elif token.startswith('COUNT') and (token == 'COUNT' or token[5:].isdigit()):
+            limit = int(token[5:] or 0)
+            report('Solution counting' + (' up to ' + str(limit) if limit else ''))
+            solver.setSolutionLimit(limit)
+
+    if isinstance(solver, portfoliosolver.PortfolioSolver):
+        report('Portfolio of ' + ', '.join(' '.join(c) for c in solver.configurations))
+        return
+
+    if not isinstance(solver, btsolver.BTSolver):
+        report('Dancing Links (DLX)')
+        return
+
+    if 'CACHE' in tokens:
+        report('Solution cache')
+        solver.setCache(solutioncache.getSharedCache())
+
+    if 'PROFILE' in tokens:
+        report('Profiling')
+        solver.setProfiling()
 
-    if solverObj.preprocessing_startTime != 0:
-        output += "\nPREPROCESSING_START=" + str(time.asctime(time.localtime(solverObj.preprocessing_startTime)))
-        output += "\nPREPROCESSING_DONE=" + str(time.asctime(time.localtime(solverObj.preprocessing_endTime)))
-    else:
-        output += "\nPREPROCESSING_START=0"
-        output += "\nPREPROCESSING_DONE=0"
-
-    #print(str(solverObj.endTime) +'                  '+ str(solverObj.startTime))
-    #solverObj.startTime = solverObj.endTime - 1
-    output += "\nSEARCH_START=" + str(time.asctime(time.localtime(solverObj.startTime)))
-    output += "\nSEARCH_DONE=" + str(time.asctime(time.localtime(solverObj.endTime)))
-    output += "\nSOLUTION_TIME=%.7f" % ((solverObj.preprocessing_endTime - solverObj.preprocessing_startTime)
-                                            + (solverObj.endTime-solverObj.startTime))
+    if 'FC' in tokens:
+        report('Forward Checking')
+        solver.setConsistencyChecks(btsolver.ConsistencyCheck['ForwardChecking'])
+
+    elif 'ACP' in tokens:
+        report('Arc Consistency')
+        solver.setConsistencyChecks(btsolver.ConsistencyCheck['ArcConsistency'])
+
+    if 'NKP' in tokens:
+        report('Naked Pairs')
+        solver.setHeuristicChecks(btsolver.HeuristicCheck['NKP'])
+
+    if 'NKT' in tokens:
+        report('Naked Triples')
+        solver.setHeuristicChecks(btsolver.HeuristicCheck['NKT'])
+
+    if 'HS' in tokens:
+        report('Hidden Singles')
+        solver.setHeuristicChecks(btsolver.HeuristicCheck['HS'])
+
+    # NKS<k> and HDS<k> look for naked and hidden subsets of up to k cells,
+    # e.g. NKS4 for quads; without a number k defaults to 4
+    for token in tokens:
+        for name, label in (('NKS', 'Naked Subsets'), ('HDS', 'Hidden Subsets')):
+            if token.startswith(name) and (token == name or token[len(name):].isdigit()):
+                k = int(token[len(name):] or 4)
+                report(label + ' up to size ' + str(k))
+                solver.setHeuristicChecks(btsolver.HeuristicCheck[name])
+                if name == 'NKS':
+                    solver.setNakedSubsetSize(k)
+                else:
+                    solver.setHiddenSubsetSize(k)
+
+    if 'MRV' in tokens and 'DH' in tokens:
+        report('Minimum Remaining Values, ties broken by Degree Heuristic')
+        solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['MRVDH'])
+
+    elif 'MRV' in tokens:
+        report('Minimum Remaining Values')
+        solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['MRV'])
+
+    elif 'DH' in tokens:
+        report('Degree Heuristic')
+        solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['DH'])
+
+    if 'LCV' in tokens:
+        report('Least Constrained Value')
+        solver.setValueSelectionHeuristic(btsolver.ValueSelectionHeuristic['LCV'])
+
+    # LUBY<k> restarts the search after k, k, 2k, k, k, 2k, 4k, ... nodes and
+    # GEOM<k> after k, 1.5k, 2.25k, ... nodes, k defaulting to 100. SEED<n>
+    # seeds the random tie breaking restarts need (0 by default, so runs are
+    # reproducible); on its own it randomizes a single search
+    seed = None
+    for token in tokens:
+        if token.startswith('SEED') and token[4:].isdigit():
+            seed = int(token[4:])
+    for token in tokens:
+        for name, label in (('LUBY', 'Luby'), ('GEOM', 'Geometric')):
+            if token.startswith(name) and (token == name or token[len(name):].isdigit()):
+                base = int(token[len(name):] or 100)
+                if base < 1:
+                    raise ValueError(token + ": restarts need a base of at least 1 node")
+                report(label + ' restarts from ' + str(base) + ' nodes')
+                solver.setRestarts(btsolver.RestartSchedule[label], base)
+                if seed is None:
+                    seed = 0
+
+    if seed is not None:
+        report('Random tie breaking, seed ' + str(seed))
+        solver.setRandom(random.Random(seed))
+
+
+def solverStatus(solverObj, isTimeOut):
+    """ @return timeout, success or error """
     if isTimeOut:
-        output += "\nSTATUS=timeout"
+        return "timeout"
     elif solverObj.hassolution:
-        output += "\nSTATUS=success"
+        return "success"
     else:
-        output += "\nSTATUS=error"
+        return "error"
 
-    # print(self.gameboard.board)
-    output += "\nSOLUTION=("
-    for i in solverObj.gameboard.board:
-        for j in i:
-            output += str(j) + ","
-    output = output[:-1]
-    output += ")"
 
-    output += "\nCOUNT_NODES=" + str(solverObj.numAssignments)
-    output += "\nCOUNT_DEADENDS=" + str(solverObj.numBacktracks)
-    output += "\n" + str(solverObj.gameboard)
+def printSolverStats(solverObj,totalStart,isTimeOut):
+    output = ["TOTAL_START=" + str(time.asctime(time.localtime(totalStart)))]
 
-    return output
+    if solverObj.preprocessing_startTime != 0:
+        output.append("PREPROCESSING_START=" + str(time.asctime(time.localtime(solverObj.preprocessing_startTime))))
+        output.append("PREPROCESSING_DONE=" + str(time.asctime(time.localtime(solverObj.preprocessing_endTime))))
+    else:
+        output.append("PREPROCESSING_START=0")
+        output.append("PREPROCESSING_DONE=0")
+
+    output.append("SEARCH_START=" + str(time.asctime(time.localtime(solverObj.startTime))))
+    output.append("SEARCH_DONE=" + str(time.asctime(time.localtime(solverObj.endTime))))
+    output.append("SOLUTION_TIME=%.7f" % ((solverObj.preprocessing_endTime - solverObj.preprocessing_startTime)
+                                          + (solverObj.endTime-solverObj.startTime)))
+    output.append("STATUS=" + solverStatus(solverObj, isTimeOut))
+    output.append("SOLUTION=(" + ",".join(str(j) for i in solverObj.gameboard.board for j in i) + ")")
+
+    output.append("COUNT_NODES=" + str(solverObj.numAssignments))
+    output.append("COUNT_DEADENDS=" + str(solverObj.numBacktracks))
+    if getattr(solverObj, "restartSchedule", 0):
+        output.append("COUNT_RESTARTS=" + str(solverObj.numRestarts))
+    if solverObj.solutionLimit != 1:
+        # a count equal to a nonzero limit means there may be more solutions
+        output.append("SOLUTION_COUNT=" + str(solverObj.numSolutions))
+        output.append("SOLUTION_LIMIT=" + str(solverObj.solutionLimit))
+    if getattr(solverObj, "winner", None) is not None:
+        output.append("PORTFOLIO_WINNER=" + " ".join(solverObj.winner))
+        output.append("PORTFOLIO_SIZE=" + str(len(solverObj.configurations)))
+    if getattr(solverObj, "cache", None) is not None:
+        output.append("CACHE=" + ("hit" if solverObj.cacheHit else "miss"))
+        output.append("CACHE_SIZE=" + str(len(solverObj.cache)))
+    if solverObj.profile is not None:
+        output.append(str(solverObj.profile))
+    output.append(str(solverObj.gameboard))
+
+    return "\n".join(output)
 
 
 if __name__ == '__main__':
@@ -68,14 +213,13 @@ if __name__ == '__main__':
     print(sudokudata)
     # cn = filereader.GameBoardToConstraintNetwork(sudokudata)
     # print(cn)
-    solver = btsolver.BTSolver(sudokudata)
+    tokens = sys.argv[4:]
+    solver = createSolver(sudokudata, tokens)
 
     #three examples of how you would change the various aspects of solver
     # solver.setConsistencyChecks(btsolver.ConsistencyCheck['None'])
     # solver.setValueSelectionHeuristic(btsolver.ValueSelectionHeuristic['None'])
     # solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['None'])
-    tokens = sys.argv[4:]
-    solver.setTokens(tokens)
 
     '''once you have implemented more heuristics, you can add the appropriate lines to this conditional clause'''
     if len(sys.argv) < 4:
@@ -84,52 +228,26 @@ if __name__ == '__main__':
         print("Default option tokens detected: Backtracking Search (BT)")
     elif sys.argv[4] == 'FC':
         print("FC tokens detected:  Forward Checking (FC)")
-        solver.setConsistencyChecks(btsolver.ConsistencyCheck['ForwardChecking'])
     else:
         print("Default option tokens detected: something else ...")
 
-    #uncomment once you have implemented the appropriate heuristics
-    
-    if 'FC' in tokens:
-        print('Forward Checking')
-        solver.setConsistencyChecks(btsolver.ConsistencyCheck['ForwardChecking'])
-
-    elif 'ACP' in tokens:
-        print('Arc Consistency')
-        solver.setConsistencyChecks(btsolver.ConsistencyCheck['ArcConsistency'])
-
-    if 'NKP' in tokens:
-        print('Naked Pairs')
-        solver.setHeuristicChecks(btsolver.HeuristicCheck['NKP'])
-    
-    if 'NKT' in tokens:
-        print('Naked Triples')
-        solver.setHeuristicChecks(btsolver.HeuristicCheck['NKT'])
+    setSolverTokens(solver, tokens)
 
-    if 'MRV' in tokens:
-        print('Minimum Remaining Values')
-        solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['MRV'])
-
-    elif 'DH' in tokens:
-        print('Degree Heuristic')
-        solver.setVariableSelectionHeuristic(btsolver.VariableSelectionHeuristic['DH'])
-
-    if 'LCV' in tokens:
-        print('Least Constrained Value')
-        solver.setValueSelectionHeuristic(btsolver.ValueSelectionHeuristic['LCV'])
-
-       
     isTimeOut = False
     signal.signal(signal.SIGALRM, signal_handler)
     signal.alarm(int(sys.argv[3]))
     try:
         solver.solve()
-    except IndexError:
+    except TimeoutException:
         isTimeOut = True
         solver.endTime = time.time()
         print ("Timed out by " + sys.argv[3] + " seconds !!!")
 
-    print(printSolverStats(solver,TOTAL_START,isTimeOut))
+    if getattr(solver, "cache", None) is not None:
+        solver.cache.save()
+
+    stats = printSolverStats(solver,TOTAL_START,isTimeOut)
+    print(stats)
 
     with open(sys.argv[2],"w") as outfile:
-        outfile.write(printSolverStats(solver,TOTAL_START,isTimeOut))
+        outfile.write(stats)
@@ -0,0 +1,185 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import time
+import multiprocessing
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import gameboard
+
+# token combinations raced by default, chosen to behave differently on the
+# same board: forward checking against arc consistency, and with or without
+# the degree, value ordering and subset heuristics
+DEFAULT_PORTFOLIO = ["FC MRV", "FC MRV DH LCV", "ACP MRV", "ACP MRV NKP NKT", "FC MRV HS"]
+
+# seconds between checks for runs that died without posting a result
+POLLINTERVAL = 0.1
+
+
+class PortfolioSolver:
+    "Races several solver configurations on the same board"
+
+    ######### Constructors Method #########
+    def __init__(self, gb, configurations):
+        """
+            Solves the board once per configuration, each in its own process,
+            and keeps the first run to finish. The other runs are then
+            terminated. A run finishes when it finds its solutions or proves
+            there are none; either way every other run would reach the same
+            answer, so the first one stands for all of them.
+
+            Exposes the same fields as BTSolver so main.printSolverStats can
+            report on it. The times are the wall clock times of the whole race;
+            the counts are those of the winning run.
+
+            @param configurations list of token lists, each set on its own
+                                  solver with main.setSolverTokens
+        """
+        self.hassolution = False
+        self.gameboard = gb
+        self.configurations = configurations
+
+        self.numAssignments = 0
+        self.numBacktracks = 0
+        self.numSolutions = 0
+        self.solutionLimit = 1  # stop after this many solutions, 0 to count them all
+        self.preprocessing_startTime = 0
+        self.preprocessing_endTime = 0
+        self.startTime = None
+        self.endTime = None
+        self.profile = None  # PROFILE lines of the winning run, if it had the token
+        self.winner = None  # tokens of the winning configuration
+
+        self.tokens = []  # tokens(heuristics to use)
+
+    ######### Modifiers Method #########
+    def setTokens(self, tokens):
+        ''' set the set of heuristics to be taken into consideration'''
+        self.tokens = tokens
+
+    def setSolutionLimit(self, limit):
+        '''
+            modify the number of solutions to find before stopping, 0 for all of
+            them. Only reported; every run takes its limit from its own tokens.
+        '''
+        self.solutionLimit = limit
+
+    ######### Accessors Method #########
+    def getSolution(self):
+        return self.gameboard
+
+    # @return time required for the solver to attain in seconds
+    def getTimeTaken(self):
+        return self.endTime - self.startTime
+
+    ######### Solver Method #########
+    def solve(self):
+        """
+            Starts one process per configuration and waits for the first one to
+            finish. A run that fails, or dies without a result (killed, out of
+            memory), drops out of the race. The processes still running are
+            terminated on the way out, also when the wait is interrupted by a
+            timeout.
+            @throws ValueError if this process is daemonic, like the workers of
+                    batchsolver.py, or if every run failed
+        """
+        if multiprocessing.current_process().daemon:
+            raise ValueError("PORTFOLIO needs to start processes, which a daemonic process "
+                             "such as a batchsolver.py worker cannot do")
+
+        self.startTime = time.time()
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=runConfiguration, args=(k, self.gameboard, tokens, results))
+                     for k, tokens in enumerate(self.configurations)]
+        started = []
+        try:
+            for process in processes:
+                process.daemon = True
+                process.start()
+                started.append(process)
+            record = self.waitForWinner(processes, results)
+        finally:
+            for process in started:
+                if process.is_alive():
+                    process.terminate()
+            for process in started:
+                process.join()
+        self.endTime = time.time()
+
+        self.winner = self.configurations[record["index"]]
+        self.hassolution = record["hassolution"]
+        self.numAssignments = record["nodes"]
+        self.numBacktracks = record["deadends"]
+        self.numSolutions = record["solutions"]
+        self.profile = record["profile"]
+        if self.hassolution:
+            self.gameboard = gameboard.GameBoard(self.gameboard.N, self.gameboard.p, self.gameboard.q,
+                                                 record["board"])
+
+    def waitForWinner(self, processes, results):
+        """
+            @return the first result record without an error message
+            @throws ValueError if every run failed or died
+        """
+        finished = set()  # runs that posted a result or died
+        dead = set()  # runs found dead at the previous check
+        errors = []
+        while len(finished) < len(processes):
+            try:
+                record = results.get(timeout=POLLINTERVAL)
+            except queue.Empty:
+                # a run flushes its result before it exits, so one found dead
+                # twice in a row never posted one
+                for k, process in enumerate(processes):
+                    if k in finished or process.is_alive():
+                        continue
+                    if k in dead:
+                        finished.add(k)
+                        errors.append("%s: exited with code %s without a result"
+                                      % (" ".join(self.configurations[k]), process.exitcode))
+                    dead.add(k)
+                continue
+
+            finished.add(record["index"])
+            if "message" not in record:
+                return record
+            errors.append(record["message"])
+        raise ValueError("Every configuration of the portfolio failed: " + "; ".join(errors))
+
+
+def portfolioConfigurations(tokens):
+    """
+        @return the token lists raced for the command line tokens: every
+                configuration of DEFAULT_PORTFOLIO, each with the tokens given
+                besides PORTFOLIO (e.g. UNIQUE or PROFILE) added to it
+    """
+    extra = [token for token in tokens if token != 'PORTFOLIO']
+    return [configuration.split() + extra for configuration in DEFAULT_PORTFOLIO]
+
+
+def runConfiguration(index, gb, tokens, results):
+    """
+        Solves the board with one configuration inside a portfolio process and
+        puts a result record on the results queue.
+    """
+    import main
+    record = {"index": index}
+    try:
+        solver = main.createSolver(gb, tokens)
+        main.setSolverTokens(solver, tokens, verbose=False)
+        solver.solve()
+    except Exception as e:
+        record["message"] = " ".join(tokens) + ": " + str(e)
+        results.put(record)
+        return
+
+    record["hassolution"] = solver.hassolution
+    record["nodes"] = solver.numAssignments
+    record["deadends"] = solver.numBacktracks
+    record["solutions"] = solver.numSolutions
+    record["profile"] = None if solver.profile is None else str(solver.profile)
+    record["board"] = solver.gameboard.board if solver.hassolution else None
+    results.put(record)
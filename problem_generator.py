@@ -3,10 +3,17 @@
 
 # Rule 1: no row, column, or box can contain the same symbol more than once
 # Randomly Select a cell. Try to assign a number. if the number violates the rule 1, do not assign it and erase that number from database.
+import argparse
 import itertools
+import multiprocessing
 import random
+import sys
+import time
 from sys import argv
 
+import gameboard
+import dlxsolver
+
 
 class UnassignableVariableException(Exception):
     def __init__(self, variable):
@@ -44,7 +51,7 @@ def assignValue(var, board, assignable, N, P, Q):
     random.shuffle(assignable[var])
     for val in assignable[var]:
         if isValidValue(var, conversion[val], board, N, P, Q):
-	    board[var] = conversion[val]
+            board[var] = conversion[val]
             assignable[var].remove(val)
             return
         assignable[var].remove(val)
@@ -127,6 +134,58 @@ def populateBoard(M, N, P, Q):
             board = None
 
 
+def generateUniqueBoard(M, N, P, Q, rng=random):
+    """
+    Builds a random full grid, then takes clues out of it one at a time, in random order, as long as the puzzle keeps
+    a single solution.
+
+    Everything runs on one Dancing Links matrix. Taking clue (i, j) = v out of a puzzle with a single solution leaves
+    a single solution exactly when the other clues have no solution with another value in (i, j), so each step is one
+    search, for a single solution, with v hidden from the cell. The clues still to be tried stay placed in the matrix
+    from one step to the next; only the clues kept so far are placed again for each search.
+
+    :param M: The number of clues to stop at
+    :param N: The edge length of the board
+    :param rng: The random.Random drawing the grid and the removal order
+    :return: the board, with more than M clues if no more of them could be taken out
+    """
+    solver = dlxsolver.DLXSolver(gameboard.GameBoard(N, P, Q, [[0] * N for i in range(N)]))
+    solver.setRandom(rng)
+    solver.buildMatrix()
+    solver.countSolutions(1)
+    grid = solver.getSolution().board
+
+    # the first clue to try goes on top of the placements
+    order = list(itertools.product(range(N), repeat=2))
+    rng.shuffle(order)
+    for (i, j) in reversed(order):
+        solver.placeCandidate(i, j, grid[i][j])
+
+    kept = []
+    for index, (i, j) in enumerate(order):
+        if len(kept) + len(order) - index <= M:
+            kept.extend(order[index:])
+            break
+
+        v = grid[i][j]
+        solver.unplaceCandidate()
+        for (k1, k2) in kept:
+            solver.placeCandidate(k1, k2, grid[k1][k2])
+        solver.hideCandidate(i, j, v)
+        removable = solver.countSolutions(1) == 0
+        solver.unhideCandidate(i, j, v)
+        for (k1, k2) in kept:
+            solver.unplaceCandidate()
+
+        if not removable:
+            kept.append((i, j))
+
+    board = createBoard(N)
+    for (i, j) in kept:
+        board[(i, j)] = gameboard.INTTOODOMETER[grid[i][j]]
+    return board
+
+
 def readInput(inputFilename):
     with open(inputFilename, 'r') as f:
         line = f.readline()
@@ -150,26 +209,102 @@ def readInput(inputFilename):
 
 def writeOutput(outputFilename, N, P, Q, board):
     with open(outputFilename, 'w') as f:
-        f.write("{0} {1} {2}\n".format(N, P, Q))
-        f.write(printBoard(board, N))
+        f.write(formatPuzzle(N, P, Q, board))
 
 
-def parseCommandLineArguments():
-    if len(argv) != 3:
-        print("Insufficient number of arguments. Usage: python3 problem_generator.py input-file output-file")
-        exit(-1)
+def formatPuzzle(N, P, Q, board):
+    """The puzzle in the solver's input format: the N P Q line followed by the board"""
+    return "{0} {1} {2}\n".format(N, P, Q) + printBoard(board, N)
+
+
+def countClues(board):
+    return len([var for var in board if board[var] != 0])
+
 
-    inputFilename = argv[1]
-    outputFilename = argv[2]
-    return inputFilename, outputFilename
+def deriveSeed(baseSeed, index):
+    """The seed of the index-th puzzle of a corpus, so any puzzle can be generated again on its own"""
+    return (baseSeed << 32) | index
+
+
+def generatePuzzle(task):
+    """
+    Generates one puzzle of a corpus inside a worker process.
+
+    :param task: (index, seed, M, N, P, Q, unique)
+    :return: (index, seed, number of clues, the puzzle in the solver's input format)
+    """
+    index, seed, M, N, P, Q, unique = task
+    if unique:
+        board = generateUniqueBoard(M, N, P, Q, random.Random(seed))
+    else:
+        # populateBoard draws from the module's random state, which is this worker's own
+        random.seed(seed)
+        board = populateBoard(M, N, P, Q)
+    return index, seed, countClues(board), formatPuzzle(N, P, Q, board)
+
+
+def generateCorpus(outputFilename, K, M, N, P, Q, unique, workers, baseSeed):
+    """
+    Generates K puzzles on a pool of worker processes and writes them, in seed order, one after the other into a
+    single corpus file as they come in. Puzzle i is drawn from deriveSeed(baseSeed, i).
+    """
+    start = time.time()
+    tasks = [(i, deriveSeed(baseSeed, i), M, N, P, Q, unique) for i in range(K)]
+    step = max(1, K // 20)
+    pool = multiprocessing.Pool(workers)
+    try:
+        with open(outputFilename, 'w') as f:
+            for done, (index, seed, clues, text) in enumerate(pool.imap(generatePuzzle, tasks), 1):
+                f.write(text)
+                if done % step == 0 or done == K:
+                    elapsed = time.time() - start
+                    print("GENERATED={0}/{1}\tELAPSED={2:.1f}\tPUZZLES_PER_SECOND={3:.3f}".format(
+                        done, K, elapsed, done / elapsed if elapsed > 0 else 0.0))
+                    sys.stdout.flush()
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def parseCommandLineArguments():
+    parser = argparse.ArgumentParser(description="Generate Monster Sudoku problems.")
+    parser.add_argument("input", help="file holding the M N P Q line")
+    parser.add_argument("output", help="puzzle file to write, or the corpus file with -k")
+    parser.add_argument("mode", nargs="?", choices=["UNIQUE"],
+                        help="generate puzzles with exactly one solution")
+    parser.add_argument("-k", "--count", type=int, default=None,
+                        help="generate this many puzzles into one corpus file")
+    parser.add_argument("-j", "--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes with -k (default: number of cores)")
+    parser.add_argument("-s", "--seed", type=int, default=None,
+                        help="base seed with -k; puzzle i is drawn from a seed derived from it (default: random)")
+    return parser.parse_args(argv[1:])
 
 
 def main():
-    inputFilename, outputFilename = parseCommandLineArguments()
-    M, N, P, Q = readInput(inputFilename)
-    board = populateBoard(M, N, P, Q)
-    writeOutput(outputFilename, N, P, Q, board)
-    print("Successfully generated a Monster Sudoku problem in <{0}>".format(outputFilename))
+    args = parseCommandLineArguments()
+    M, N, P, Q = readInput(args.input)
+    unique = args.mode == "UNIQUE"
+
+    if args.count is not None:
+        baseSeed = args.seed if args.seed is not None else random.randrange(1 << 31)
+        print("SEED={0}".format(baseSeed))
+        generateCorpus(args.output, args.count, M, N, P, Q, unique, max(1, args.workers), baseSeed)
+        print("Successfully generated {0} Monster Sudoku problems in <{1}>".format(args.count, args.output))
+        return
+
+    if unique:
+        board = generateUniqueBoard(M, N, P, Q)
+        clues = countClues(board)
+        if clues > M:
+            print("No more clues could be removed: the puzzle has {0} clues".format(clues))
+    else:
+        board = populateBoard(M, N, P, Q)
+    writeOutput(args.output, N, P, Q, board)
+    print("Successfully generated a Monster Sudoku problem in <{0}>".format(args.output))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,75 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import csv
+import json
+
+import gameboard
+import filereader
+
+FORMATS = ["text", "ndjson", "csv"]
+
+# columns of the csv format; records leave out the ones that do not apply
+FIELDS = ["file", "status", "time", "nodes", "deadends", "solutions", "solution", "message"]
+
+BUFFERSIZE = 1 << 20
+
+
+def compactSolution(board):
+    """ @return the board as one character per cell, as read back by filereader.SudokuStreamReader """
+    return "".join(gameboard.INTTOODOMETER[x] for row in board for x in row)
+
+
+class ResultWriter:
+    def __init__(self, path, form="text"):
+        """
+            Streams the result records of a batch run to a file, one line per
+            puzzle, through a large write buffer.
+
+            The text form writes KEY=VALUE lines in the style of
+            main.printSolverStats, followed by the summary of the run. The
+            ndjson form writes one JSON object per line, and the csv form a
+            header row then one row per puzzle; both leave the summary out so
+            the file only holds records.
+
+            @param form one of FORMATS
+        """
+        if form not in FORMATS:
+            raise ValueError("Unknown result format \"" + form + "\", expected one of " + ", ".join(FORMATS))
+        self.form = form
+        self.file = open(path, "w", BUFFERSIZE)
+        self.csv = None
+        if form == "csv":
+            self.csv = csv.writer(self.file, lineterminator="\n")
+            self.csv.writerow(FIELDS)
+
+    ######### Modifiers Method #########
+    def write(self, record):
+        if self.form == "ndjson":
+            self.file.write(json.dumps(record, separators=(",", ":"), sort_keys=True) + "\n")
+        elif self.form == "csv":
+            self.csv.writerow([record.get(field, "") for field in FIELDS])
+        else:
+            self.file.write(formatText(record) + "\n")
+
+    def writeSummary(self, summary):
+        if self.form == "text":
+            self.file.write(summary + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def formatText(record):
+    """ one line of KEY=VALUE pairs in the style of main.printSolverStats """
+    output = "FILE=" + record["file"]
+    output += "\tSTATUS=" + record["status"]
+    output += "\tSOLUTION_TIME=%.7f" % record["time"]
+    output += "\tCOUNT_NODES=" + str(record["nodes"])
+    output += "\tCOUNT_DEADENDS=" + str(record["deadends"])
+    output += "\tSOLUTION=(" + ",".join(str(filereader.ODOMETERTOINT[x]) for x in record["solution"]) + ")"
+    if "solutions" in record:
+        output += "\tSOLUTION_COUNT=" + str(record["solutions"])
+    if "message" in record:
+        output += "\tMESSAGE=" + record["message"]
+    return output
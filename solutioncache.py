@@ -0,0 +1,296 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import os
+import json
+import math
+import itertools
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_PATH = "solutioncache.json"
+
+# largest number of row and column orders tried when the invariants of the
+# lines tie; past it the ties are kept in board order, see canonicalForm
+MAXORDERINGS = 256
+
+
+class SolutionCache:
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None):
+        """
+            Solutions of boards keyed by their canonical form, so a board is
+            found again after its digits are relabeled, its rows and columns
+            are permuted within their bands and stacks, the bands and stacks
+            are permuted, or it is transposed (square blocks only).
+
+            Entries are kept in least recently used order and the oldest one
+            is evicted past capacity. Solutions are stored in canonical form and
+            mapped back through the symmetry of the board looked up.
+
+            Boards already looked up or stored are also kept as they are, with
+            their solution already mapped back, so an exact repeat is found
+            without putting it in canonical form. These are not saved.
+
+            @param capacity largest number of entries kept
+            @param path file the entries are loaded from, if it exists, and
+                        saved to by save. None keeps the cache in memory.
+        """
+        self.capacity = capacity
+        self.path = path
+        self.entries = OrderedDict()
+        self.exact = OrderedDict()  # exactKey of a board -> (canonical key, solution rows)
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.isfile(path):
+            self.load()
+
+    ######### Accessors Method #########
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, gb):
+        """
+            @return the solution of gb as a list of rows, or None if the cache
+                    holds no board of the same canonical form
+        """
+        raw = exactKey(gb)
+        seen = self.exact.pop(raw, None)
+        if seen is not None and seen[0] in self.entries:
+            self.exact[raw] = seen
+            self.entries.move_to_end(seen[0])
+            self.hits += 1
+            return [list(row) for row in seen[1]]
+
+        key, transform = canonicalForm(gb)
+        solution = self.entries.pop(key, None)
+        if solution is None:
+            self.misses += 1
+            return None
+        self.entries[key] = solution
+
+        board = fromCanonical(solution, gb.N, transform)
+        # a solution read from a file could have been edited since
+        for row, solved in zip(gb.board, board):
+            for given, value in zip(row, solved):
+                if given and given != value:
+                    self.misses += 1
+                    return None
+        self.remember(raw, key, board)
+        self.hits += 1
+        return board
+
+    ######### Modifiers Method #########
+    def store(self, gb, solution):
+        """
+            Adds the solution of gb, evicting the least recently used entry if
+            the cache is full.
+            @param solution list of rows solving gb
+        """
+        key, transform = canonicalForm(gb)
+        self.entries.pop(key, None)
+        self.entries[key] = toCanonical(solution, gb.N, transform)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        self.remember(exactKey(gb), key, solution)
+
+    def remember(self, raw, key, solution):
+        """
+            Keeps the solution of a board under its exactKey, evicting the least
+            recently used board past capacity. It is only returned while the
+            entry of its canonical key is still in the cache.
+        """
+        self.exact.pop(raw, None)
+        self.exact[raw] = (key, [list(row) for row in solution])
+        while len(self.exact) > self.capacity:
+            self.exact.popitem(last=False)
+
+    def load(self):
+        """ replaces the entries with the ones saved in path """
+        with open(self.path) as f:
+            data = json.load(f)
+        self.entries = OrderedDict((key, solution) for key, solution in data["entries"])
+        self.exact = OrderedDict()
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        """ writes the entries to path, oldest first, replacing the file in one step """
+        if self.path is None:
+            return
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"entries": [[key, solution] for key, solution in self.entries.items()]},
+                      f, separators=(",", ":"))
+        if os.path.exists(self.path) and not hasattr(os, "replace"):
+            os.remove(self.path)
+        getattr(os, "replace", os.rename)(temp, self.path)
+
+
+sharedCache = None
+
+
+def getSharedCache():
+    """ @return the cache of this process, loaded from DEFAULT_PATH on first use """
+    global sharedCache
+    if sharedCache is None:
+        sharedCache = SolutionCache(DEFAULT_CAPACITY, DEFAULT_PATH)
+    return sharedCache
+
+
+######### Canonical Form Method #########
+def exactKey(gb):
+    """ @return key of the board exactly as given, without looking for its symmetries """
+    return "%d %d %d:" % (gb.N, gb.p, gb.q) + ",".join(str(x) for row in gb.board for x in row)
+
+
+def canonicalForm(gb):
+    """
+        Puts the board in a canonical form under the symmetries of sudoku.
+
+        Rows are ordered by invariants that do not change under the other
+        symmetries: bands by the invariants of their rows, then the rows within
+        each band; columns likewise. Where invariants tie, every order of the
+        tied lines is tried, up to MAXORDERINGS, and the lexicographically
+        smallest board wins after the digits are relabeled in order of first
+        appearance. Past MAXORDERINGS ties keep their board order, so a
+        symmetric variant of such a board may get another key; the key is
+        always the board itself in another form, so a hit is always right.
+
+        @return (key, transform) where transform is (transposed, row order,
+                column order, labels) and labels[d] is the canonical digit of d
+    """
+    best = None
+    for transposed in ([False, True] if gb.p == gb.q else [False]):
+        board = transpose(gb.board) if transposed else gb.board
+        cells, rowOrder, colOrder, labels = minimalForm(board, gb.N, gb.p, gb.q)
+        if best is None or cells < best[0]:
+            best = (cells, (transposed, rowOrder, colOrder, labels))
+    cells, transform = best
+    key = "%d %d %d:" % (gb.N, gb.p, gb.q) + ",".join(str(x) for x in cells)
+    return key, transform
+
+
+def minimalForm(board, N, p, q):
+    """
+        @return (cells, row order, column order, labels) of the smallest
+                relabeled board over the row and column orders tried
+    """
+    count = [0] * (N + 1)
+    for row in board:
+        for x in row:
+            count[x] += 1
+    columns = [[board[i][j] for i in range(N)] for j in range(N)]
+
+    # bands of p rows meet the stacks in q columns and the other way round
+    rowOrders = lineOrders([lineInvariant(row, q, count) for row in board], p)
+    colOrders = lineOrders([lineInvariant(col, p, count) for col in columns], q)
+    if len(rowOrders) * len(colOrders) > MAXORDERINGS:
+        rowOrders = rowOrders[:1]
+        colOrders = colOrders[:1]
+
+    best = None
+    for rowOrder in rowOrders:
+        for colOrder in colOrders:
+            cells, labels = relabel(board, N, rowOrder, colOrder)
+            if best is None or cells < best[0]:
+                best = (cells, rowOrder, colOrder, labels)
+    return best
+
+
+def lineInvariant(line, size, count):
+    """
+        @return what the other symmetries leave of a row or column: how many
+                givens it has in each block it crosses and how often each of
+                its digits is given on the whole board, both sorted
+        @param size length of the line in one block
+    """
+    givens = tuple(sorted(sum(1 for x in line[k:k + size] if x) for k in range(0, len(line), size)))
+    return givens, tuple(sorted(count[x] for x in line if x))
+
+
+def lineOrders(invariants, size):
+    """
+        @return list of the line orders sorting the groups of size lines (the
+                bands or the stacks) then the lines within each group by their
+                invariants, one order per way of arranging the lines that tie
+    """
+    groups = [list(range(k, k + size)) for k in range(0, len(invariants), size)]
+    inner = [tiedOrders(group, lambda i: invariants[i]) for group in groups]
+    groupKey = lambda g: tuple(sorted(invariants[i] for i in groups[g]))
+    groupOrders = tiedOrders(range(len(groups)), groupKey)
+    total = len(groupOrders)
+    for orders in inner:
+        total *= len(orders)
+    if total > MAXORDERINGS:
+        groupOrders = groupOrders[:1]
+        inner = [orders[:1] for orders in inner]
+    return [[i for part in lines for i in part]
+            for groupOrder in groupOrders
+            for lines in itertools.product(*[inner[g] for g in groupOrder])]
+
+
+def tiedOrders(items, key):
+    """
+        @return list of the orders of items sorted by key, one per arrangement
+                of the items that tie, or only the sorted order if there are
+                more than MAXORDERINGS of them
+    """
+    ties = [list(g) for k, g in itertools.groupby(sorted(items, key=key), key)]
+    total = 1
+    for t in ties:
+        total *= math.factorial(len(t))
+    if total > MAXORDERINGS:
+        return [[i for t in ties for i in t]]
+    return [[i for part in parts for i in part]
+            for parts in itertools.product(*[itertools.permutations(t) for t in ties])]
+
+
+def relabel(board, N, rowOrder, colOrder):
+    """
+        @return the cells of the board in the given order with the digits
+                renamed 1, 2, ... by first appearance, and the labels used.
+                Digits absent from the board take the labels left in order.
+    """
+    labels = [0] * (N + 1)
+    nextLabel = 1
+    cells = []
+    for i in rowOrder:
+        row = board[i]
+        for j in colOrder:
+            x = row[j]
+            if x and not labels[x]:
+                labels[x] = nextLabel
+                nextLabel += 1
+            cells.append(labels[x])
+    for d in range(1, N + 1):
+        if not labels[d]:
+            labels[d] = nextLabel
+            nextLabel += 1
+    return cells, labels
+
+
+def transpose(board):
+    return [list(col) for col in zip(*board)]
+
+
+def toCanonical(solution, N, transform):
+    """ @return the solution of a board in the canonical form of the board, as a flat list """
+    transposed, rowOrder, colOrder, labels = transform
+    if transposed:
+        solution = transpose(solution)
+    return [labels[solution[i][j]] for i in rowOrder for j in colOrder]
+
+
+def fromCanonical(cells, N, transform):
+    """ @return the list of rows of a canonical solution mapped back to the board of transform """
+    transposed, rowOrder, colOrder, labels = transform
+    digits = [0] * (N + 1)
+    for d in range(1, N + 1):
+        digits[labels[d]] = d
+    board = [[0] * N for i in range(N)]
+    k = 0
+    for i in rowOrder:
+        for j in colOrder:
+            board[i][j] = digits[cells[k]]
+            k += 1
+    return transpose(board) if transposed else board
@@ -0,0 +1,87 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+import time
+
+from domain import popcount
+
+# perf_counter is finer than time.time where it exists (Python 3)
+timer = getattr(time, "perf_counter", time.time)
+
+# solver methods timed by attach, in the order they are reported
+PHASES = ["checkConsistency", "checkHeuristics", "selectNextVariable", "getNextValues"]
+
+
+class SolverProfile:
+    def __init__(self):
+        """
+            Call counts and cumulative times of the phases of a BTSolver search,
+            with counts of trail pushes and undos, values removed from domains
+            and the deepest decision level reached.
+
+            Nothing is measured until attach is called: it replaces the methods
+            it measures on the solver and trail instances with wrappers, so a
+            solver that is never attached runs its own methods untouched. Times
+            are inclusive; checkHeuristics also counts the arc consistency it
+            runs again, for instance.
+        """
+        self.calls = dict()
+        self.times = dict()
+        self.trailPushes = 0
+        self.removals = 0
+        self.maxDepth = 0
+
+    ######### Modifiers Method #########
+    def attach(self, solver):
+        """ starts measuring solver, before its search """
+        for name in PHASES:
+            self.instrument(solver, name, name)
+        trail = solver.trail
+        self.instrument(trail, "undo", "trailUndo")
+
+        push = trail.push
+        def countedPush(v):
+            self.trailPushes += 1
+            push(v)
+        trail.push = countedPush
+
+        placeTrailMarker = trail.placeTrailMarker
+        def trackedPlaceTrailMarker():
+            placeTrailMarker()
+            if len(trail.trailMarker) > self.maxDepth:
+                self.maxDepth = len(trail.trailMarker)
+        trail.placeTrailMarker = trackedPlaceTrailMarker
+
+        solver.network.addDomainListener(self.domainChanged)
+
+    def instrument(self, obj, name, label):
+        """ replaces method name of obj with one that counts and times its calls under label """
+        method = getattr(obj, name)
+        calls = self.calls
+        times = self.times
+        calls[label] = 0
+        times[label] = 0.0
+
+        def timed(*args):
+            start = timer()
+            try:
+                return method(*args)
+            finally:
+                times[label] += timer() - start
+                calls[label] += 1
+        setattr(obj, name, timed)
+
+    def domainChanged(self, v, oldBits, oldCount):
+        self.removals += popcount(oldBits & ~v.domain.bits)
+
+    ######### Accessors Method #########
+    def __str__(self):
+        """ KEY=VALUE lines in the style of main.printSolverStats """
+        output = ""
+        for label in PHASES + ["trailUndo"]:
+            output += "\nPROFILE_%s_CALLS=%d" % (label, self.calls.get(label, 0))
+            output += "\nPROFILE_%s_TIME=%.7f" % (label, self.times.get(label, 0.0))
+        output += "\nPROFILE_trailPush_CALLS=" + str(self.trailPushes)
+        output += "\nPROFILE_DOMAIN_REMOVALS=" + str(self.removals)
+        output += "\nPROFILE_MAX_DEPTH=" + str(self.maxDepth)
+        return output[1:]
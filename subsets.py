@@ -0,0 +1,40 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+from domain import popcount
+
+def findSubsets(masks, k):
+    """
+        Subset engine shared by the naked and hidden subset checks.
+
+        Enumerates the combinations of 2 to k entries of masks whose union has
+        no more bits than the combination has entries. For naked subsets the
+        masks are the domains of the cells of a unit; for hidden subsets they
+        are the positions each value can take in the unit.
+
+        A combination is abandoned as soon as its union holds more than k bits,
+        and a combination that qualifies is not extended any further.
+
+        @param masks list of integer bitmasks
+        @param k largest combination to look for
+        @return list of (indices into masks, union of their masks) pairs. A union
+                with fewer bits than indices means the unit cannot be completed.
+    """
+    found = []
+    chosen = []
+
+    def extend(start, union):
+        for i in range(start, len(masks)):
+            u = union | masks[i]
+            size = popcount(u)
+            if size > k:
+                continue
+            chosen.append(i)
+            if len(chosen) >= 2 and size <= len(chosen):
+                found.append((list(chosen), u))
+            elif len(chosen) < k:
+                extend(i + 1, u)
+            chosen.pop()
+
+    extend(0, 0)
+    return found
@@ -1,15 +1,14 @@
 # Submitter: tryond(tryon, daniel) 20621204
 # Partner: joshuaek(klein, joshua) 58485794
 
-# import copy
-import variable
-import domain
-import copy
-
 class Trail:
     def __init__(self):
         """
             Represents the trail of changes made. This allows backtracking to occur.
+
+            Each entry is a (variable, bits, count) triple holding the domain
+            bitmask and size the variable had before it was changed, so pushing
+            and undoing cost the same whatever the size of the domain.
         """
         self.trailStack = []
         self.trailMarker = []
@@ -29,12 +28,11 @@ class Trail:
 
     def push(self, v):
         """
-            Adds a deep copy of a variable and its domain onto the trail.
+            Records the current domain of a variable onto the trail. Called right
+            before the domain changes.
         """
         # print("v in push--> " + str(v))
-        domainCopy = copy.deepcopy(v.domain)
-        vPair = [v, domainCopy] # v Variable and its deepcopy backup domain onto the trail
-        self.trailStack.append(vPair)
+        self.trailStack.append((v, v.domain.bits, v.domain.count))
 
         # print("======================= ")
         # print("self.trailStack at the moment: ")
@@ -51,9 +49,8 @@ class Trail:
         targetSize = self.trailMarker.pop() # targetSize target position on the trail to backtrack to
         size = len(self.trailStack)
         while size > targetSize:
-            vPair = self.trailStack.pop()
-            v = vPair[0]
-            v.setDomain(vPair[1])
+            v, bits, count = self.trailStack.pop()
+            v.restoreDomain(bits, count)
             size -= 1
 
     def __str__(self):
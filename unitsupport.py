@@ -0,0 +1,59 @@
+# Submitter: tryond(tryon, daniel) 20621204
+# Partner: joshuaek(klein, joshua) 58485794
+
+class UnitSupport:
+    def __init__(self, network, N):
+        """
+            Keeps, for every constraint of a network (each row, column and block)
+            and every value, the number of cells of the constraint whose domain
+            still allows that value.
+
+            The counts listen to every domain change of the network, so they stay
+            current through propagation and through the restores made by the
+            trail on undo.
+        """
+        self.N = N
+        unitIndex = dict()
+        for i, c in enumerate(network.constraints):
+            unitIndex[c] = i
+
+        self.counts = [[0] * (N + 1) for c in network.constraints]
+        self.unitsOf = [[unitIndex[c] for c in network.getConstraintsContainingVariable(v)]
+                        for v in network.variables]
+        for v in network.variables:
+            for val in v.domain.values:
+                for u in self.unitsOf[v.index]:
+                    self.counts[u][val] += 1
+        network.addDomainListener(self.domainChanged)
+
+    ######### Modifiers Method #########
+    def domainChanged(self, v, oldBits, oldCount):
+        newBits = v.domain.bits
+        removed = oldBits & ~newBits
+        added = newBits & ~oldBits
+        units = [self.counts[u] for u in self.unitsOf[v.index]]
+        while removed:
+            low = removed & -removed
+            val = low.bit_length() - 1
+            for unit in units:
+                unit[val] -= 1
+            removed ^= low
+        while added:
+            low = added & -added
+            val = low.bit_length() - 1
+            for unit in units:
+                unit[val] += 1
+            added ^= low
+
+    ######### Accessors Method #########
+    def conflicts(self, v, val):
+        """
+            @return the number of other cells in the units of v that still allow
+                    val. A cell sharing two units with v is counted twice.
+        """
+        total = 0
+        for u in self.unitsOf[v.index]:
+            total += self.counts[u][val]
+        if v.domain.contains(val):
+            total -= len(self.unitsOf[v.index])
+        return total
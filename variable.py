@@ -7,13 +7,19 @@ import domain
 STATIC_NAMING_COUNTER = 1
 
 class Variable:
-    def __init__(self, possible_Values, row, col, block):
-        # self.namingCounter = 1
-        global STATIC_NAMING_COUNTER
-        self.name = "v" + str(STATIC_NAMING_COUNTER)
+    def __init__(self, possible_Values, row, col, block, name=None, trailOfVariable=None):
+        """
+            name and trailOfVariable are normally supplied by the owning
+            ConstraintNetwork (see ConstraintNetwork.newVariable). Without them the
+            variable falls back to the module naming counter and the shared
+            master trail.
+        """
+        if name is None:
+            global STATIC_NAMING_COUNTER
+            name = "v" + str(STATIC_NAMING_COUNTER)
+            STATIC_NAMING_COUNTER += 1
+        self.name = name
 
-        # self.namingCounter += 1
-        STATIC_NAMING_COUNTER += 1
         self.domain = domain.Domain(possible_Values)
         self.row = row
         self.col = col
@@ -26,7 +32,13 @@ class Variable:
             self.modified = False
             self.unchangeable = False
         self.oldSize = self.size()
-        self.trailOfVariable = trail.masterTrailVariable
+        if trailOfVariable is None:
+            trailOfVariable = trail.masterTrailVariable
+        self.trailOfVariable = trailOfVariable
+        self.index = 0
+        # callbacks run as listener(variable, oldBits, oldCount) after every
+        # domain change, including the ones undone by the trail
+        self.domainListeners = []
 
     ######### Copy Constructors Method #########
     def copy(self, v):
@@ -39,13 +51,13 @@ class Variable:
 
     ######### Accessors Method #########
     def isChangeable(self):
-        return not unchangeable
+        return not self.unchangeable
 
     def isAssigned(self):
         return self.size() == 1
 
     def isModified(self):
-        return modified
+        return self.modified
 
     def setModified(self, mod):
         self.modified = mod
@@ -59,7 +71,7 @@ class Variable:
         if not self.isAssigned():
             return 0
         else:
-            return self.domain.values[0]
+            return self.domain.lowest()
 
     def Values(self):
         return self.domain.values
@@ -78,12 +90,16 @@ class Variable:
     def updateDomain(self, d):
         """
             Used for Backtracking. Adds the changed domain to the Trail.
+            Nothing is recorded when d holds the same values as the current domain.
             @param d new domain
         """
-        self.methodModifiesDomain()
         if self.domain != d:
+            self.methodModifiesDomain()
+            old = self.domain
             self.domain = d
             self.modified = True
+            for listener in self.domainListeners:
+                listener(self, old.bits, old.count)
 
     def setDomain(self, d):
         """
@@ -91,17 +107,39 @@ class Variable:
             @param d new domain
         """
         if self.domain != d:
+            old = self.domain
             self.domain = d
             self.modified = True
+            for listener in self.domainListeners:
+                listener(self, old.bits, old.count)
 
     def removeValueFromDomain(self, val):
         """
-            Removes a single value from the domain of V.
+            Removes a single value from the domain of V. Nothing is recorded on
+            the Trail when val is not in the domain.
             @param val value to remove
         """
+        if not self.domain.contains(val):
+            return
         self.methodModifiesDomain()
         self.domain.remove(val)
         self.modified = self.domain.isModified()
+        for listener in self.domainListeners:
+            listener(self, self.domain.bits | (1 << val), self.domain.count + 1)
+
+    def restoreDomain(self, bits, count):
+        """
+            Puts back a domain recorded on the Trail without changing the Trail.
+            @param bits domain bitmask to restore
+            @param count number of values in bits
+        """
+        oldBits = self.domain.bits
+        oldCount = self.domain.count
+        self.domain.bits = bits
+        self.domain.count = count
+        self.modified = True
+        for listener in self.domainListeners:
+            listener(self, oldBits, oldCount)
 
     ######### Helper Method #########
     def methodModifiesDomain(self):